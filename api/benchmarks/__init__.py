@@ -0,0 +1,9 @@
+"""Load-test and benchmark suite for the Warehouse Management API.
+
+Usage (from the ``api/`` directory):
+
+    docker compose -f benchmarks/docker-compose.yaml up -d
+    python -m benchmarks.seed --items 1000000 --tags 50000 --notes 5000000
+    python -m benchmarks.run --target asgi --output results/asgi.json
+    python -m benchmarks.run --target uvicorn --workers 4 --output results/uvicorn.json
+"""
@@ -0,0 +1,38 @@
+"""Compare two benchmark reports written by `python -m benchmarks.run`."""
+import argparse
+import json
+
+
+METRICS = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.candidate) as f:
+        candidate = json.load(f)["results"]
+
+    print(f"{'scenario':<14}" + "".join(f"{metric:>24}" for metric in METRICS))
+    for name in baseline:
+        if name not in candidate:
+            continue
+        row = f"{name:<14}"
+        for metric in METRICS:
+            before, after = baseline[name][metric], candidate[name][metric]
+            row += f"{f'{before} -> {after} ({change(before, after)})':>24}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Deterministic synthetic data for the warehouse tables.
+
+Every generator derives its randomness from ``(seed, table, chunk)`` and every
+primary key from ``(seed, table, row index)`` plus the row's creation time, so
+workers can build rows that reference each other (an item's ``user_uid``, a
+link's ``tag_id``) without sharing any state, and the same arguments always
+produce the same dataset. Keys use the same time-ordered version 7 layout as
+the API.
+"""
+import bisect
+import hashlib
+import itertools
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
+
+
+ITEM_NOUNS = [
+    "pallet", "crate", "carton", "drum", "tote", "bin", "roll", "bundle", "case", "sack",
+]
+ITEM_GOODS = [
+    "bolts", "flour", "paint", "cable", "tiles", "rice", "coffee", "sensors", "glassware",
+    "batteries", "detergent", "tyres", "fabric", "pipes", "solar panels", "fertilizer",
+]
+OWNERS = [
+    "PT Sinar Jaya", "CV Makmur", "Nusantara Logistics", "Global Trade Co", "Andalas Foods",
+    "Borneo Timber", "Samudra Shipping", "Mitra Retail", "Java Electronics", "Bali Crafts",
+]
+TAG_WORDS = [
+    "fragile", "cold-chain", "hazmat", "oversize", "priority", "returns", "bonded", "perishable",
+    "high-value", "stackable", "flammable", "quarantine", "cross-dock", "seasonal", "export",
+]
+USER_MAX_AGE_DAYS = 900
+TAG_MAX_AGE_DAYS = 900
+
+NOTE_TEMPLATES = [
+    "Checked at dock {n}, packaging intact.",
+    "Moved to rack {n}.",
+    "Seal number {n} verified.",
+    "Minor damage on corner, photographed ({n}).",
+    "Customer requested hold until further notice ({n}).",
+    "Counted {n} units, matches manifest.",
+]
+
+
+@dataclass(frozen=True)
+class Volumes:
+    users: int
+    items: int
+    tags: int
+    notes: int
+    tags_per_item: float
+
+
+@dataclass(frozen=True)
+class Distribution:
+    seed: int
+    anchor: datetime
+    zipf_s: float = 1.1
+    notes_alpha: float = 1.5
+    max_notes_per_item: int = 5000
+
+
+def _digest(seed: int, table: str, index: int) -> bytes:
+    return hashlib.blake2b(f"{seed}:{table}:{index}".encode(), digest_size=16).digest()
+
+
+def make_uid(seed: int, table: str, index: int, created: datetime) -> uuid.UUID:
+    """Version 7 uid carrying `created`, like the ones the API generates"""
+    ms = int(created.timestamp() * 1000) & 0xFFFF_FFFF_FFFF
+    rand = int.from_bytes(_digest(seed, table, index), "big")
+    value = (ms << 80) | (0x7 << 76) | (((rand >> 64) & 0xFFF) << 64) | (0b10 << 62) | (rand & (2 ** 62 - 1))
+    return uuid.UUID(int=value)
+
+
+def make_created(seed: int, table: str, index: int, anchor: datetime, max_age_days: int) -> datetime:
+    """Creation time derived from the row index alone, so rows in other
+    chunks can rebuild the uid of a user or tag they reference"""
+    offset = int.from_bytes(_digest(seed, table, index)[:8], "big") % (max_age_days * 86400)
+    return anchor - timedelta(seconds=offset)
+
+
+def user_uid(dist: "Distribution", index: int) -> uuid.UUID:
+    return make_uid(dist.seed, "users", index, make_created(dist.seed, "users", index, dist.anchor, USER_MAX_AGE_DAYS))
+
+
+def tag_uid(dist: "Distribution", index: int) -> uuid.UUID:
+    return make_uid(dist.seed, "tags", index, make_created(dist.seed, "tags", index, dist.anchor, TAG_MAX_AGE_DAYS))
+
+
+def chunk_rng(seed: int, table: str, chunk: int) -> random.Random:
+    return random.Random(f"{seed}:{table}:{chunk}")
+
+
+def zipf_cum_weights(n: int, s: float) -> List[float]:
+    """Cumulative weights for rank r having probability proportional to 1 / r**s."""
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def zipf_sample(rng: random.Random, cum_weights: List[float], k: int) -> List[int]:
+    total = cum_weights[-1]
+    return [bisect.bisect_left(cum_weights, rng.random() * total) for _ in range(k)]
+
+
+def user_rows(vol: Volumes, dist: Distribution, start: int, stop: int, password_hash: str, admin_email: str) -> List[Tuple]:
+    rows = []
+    for i in range(start, stop):
+        created = make_created(dist.seed, "users", i, dist.anchor, USER_MAX_AGE_DAYS)
+        if i == 0:
+            username, email, role = "bench", admin_email, "admin"
+        else:
+            username, email, role = f"user{i}", f"user{i}@example.com", "user"
+        rows.append((
+            make_uid(dist.seed, "users", i, created), username, password_hash, email,
+            "Bench", f"User {i}", role, True, created, created,
+        ))
+    return rows
+
+
+def tag_rows(vol: Volumes, dist: Distribution, start: int, stop: int) -> List[Tuple]:
+    rows = []
+    for i in range(start, stop):
+        # rank 0 is the most popular tag, give it the most recognizable name
+        name = TAG_WORDS[i] if i < len(TAG_WORDS) else f"{TAG_WORDS[i % len(TAG_WORDS)]}-{i}"
+        created = make_created(dist.seed, "tags", i, dist.anchor, TAG_MAX_AGE_DAYS)
+        rows.append((make_uid(dist.seed, "tags", i, created), name, created))
+    return rows
+
+
+def note_count(rng: random.Random, vol: Volumes, dist: Distribution) -> int:
+    """Pareto distributed notes per item whose mean is notes / items."""
+    mean = vol.notes / vol.items if vol.items else 0
+    alpha = dist.notes_alpha
+    value = mean * rng.paretovariate(alpha) * (alpha - 1) / alpha
+    return min(dist.max_notes_per_item, int(value + rng.random()))
+
+
+def item_chunk_rows(vol: Volumes, dist: Distribution, start: int, stop: int, tag_weights: List[float]):
+    """Items in ``[start, stop)`` together with their tag links and notes."""
+    rng = chunk_rng(dist.seed, "items", start)
+    items, links, notes = [], [], []
+    today = dist.anchor.date()
+
+    for i in range(start, stop):
+        created = dist.anchor - timedelta(days=rng.randint(0, 720), seconds=rng.randint(0, 86399))
+        item_uid = make_uid(dist.seed, "items", i, created)
+        user_index = rng.randrange(vol.users)
+        exp_date: date = created.date() + timedelta(days=rng.randint(30, 540))
+        items.append((
+            item_uid,
+            f"{rng.choice(ITEM_NOUNS)} of {rng.choice(ITEM_GOODS)}",
+            rng.choice(OWNERS),
+            exp_date,
+            f"08{rng.randrange(10 ** 10):010d}",
+            user_uid(dist, user_index),
+            created,
+            created,
+        ))
+
+        if vol.tags:
+            k = int(rng.expovariate(1 / vol.tags_per_item)) if vol.tags_per_item else 0
+            for tag_index in set(zipf_sample(rng, tag_weights, k)):
+                links.append((item_uid, tag_uid(dist, tag_index), created))
+
+        age = max(1, (dist.anchor - created).days)
+        for n in range(note_count(rng, vol, dist)):
+            note_created = created + timedelta(days=rng.randint(0, age), seconds=rng.randint(0, 86399))
+            notes.append((
+                make_uid(dist.seed, "notes", i * dist.max_notes_per_item + n, note_created),
+                rng.choice(NOTE_TEMPLATES).format(n=rng.randint(1, 999)),
+                user_uid(dist, rng.randrange(vol.users)),
+                item_uid,
+                note_created,
+                note_created,
+            ))
+
+    expired = sum(1 for row in items if row[3] < today)
+    return items, links, notes, expired
@@ -0,0 +1,19 @@
+import os
+from pathlib import Path
+
+
+BENCH_ENV_FILE = Path(__file__).resolve().parent / "bench.env"
+
+
+def load_bench_env(path: Path = BENCH_ENV_FILE) -> None:
+    """Export the benchmark stand-in settings before `src` is imported.
+
+    Values already present in the environment win, so a run can be pointed
+    at another database with e.g. `DATABASE_URL=... python -m benchmarks.run`.
+    """
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        os.environ.setdefault(key.strip(), value.strip())
@@ -0,0 +1,227 @@
+"""Drive the real `src:app` with the benchmark scenarios and report latencies.
+
+Two targets are supported:
+
+* ``asgi``    - in-process through httpx ``ASGITransport`` (no network, one loop)
+* ``uvicorn`` - a multi-worker uvicorn subprocess reached over HTTP
+
+Results are written as JSON so runs can be diffed and compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.env import load_bench_env
+
+load_bench_env()
+
+import httpx  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from benchmarks.scenarios import SCENARIOS, BenchContext, login  # noqa: E402
+from src.config import Config  # noqa: E402
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+async def load_samples(sample_size: int):
+    """Pick random item uids and tag names to spread reads over the dataset."""
+    engine = create_async_engine(Config.DATABASE_URL)
+    async with engine.connect() as conn:
+        items = await conn.execute(
+            text("SELECT uid FROM items TABLESAMPLE SYSTEM (1) LIMIT :n"), {"n": sample_size}
+        )
+        item_uids = [str(row[0]) for row in items]
+        if not item_uids:
+            items = await conn.execute(text("SELECT uid FROM items LIMIT :n"), {"n": sample_size})
+            item_uids = [str(row[0]) for row in items]
+        tags = await conn.execute(text("SELECT name FROM tags LIMIT :n"), {"n": sample_size})
+        tag_names = [row[0] for row in tags]
+        counts = await conn.execute(
+            text(
+                """
+                SELECT (SELECT count(*) FROM users), (SELECT count(*) FROM items),
+                       (SELECT count(*) FROM tags), (SELECT count(*) FROM notes)
+                """
+            )
+        )
+        users, items_count, tags_count, notes_count = counts.one()
+    await engine.dispose()
+
+    volumes = {"users": users, "items": items_count, "tags": tags_count, "notes": notes_count}
+    return item_uids, tag_names, volumes
+
+
+async def run_scenario(client: httpx.AsyncClient, ctx: BenchContext, name: str, concurrency: int, duration: float):
+
+    scenario = SCENARIOS[name]
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, ctx)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def asgi_client():
+    from src import app
+
+    # ASGITransport doesn't send lifespan events, run the lifespan ourselves
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=60) as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(workers: int, port: int):
+    # the production entry point, so runs measure uvloop, httptools and the tuned keep-alive
+    env = {**os.environ, "WEB_HOST": "127.0.0.1", "WEB_PORT": str(port), "WEB_WORKERS": str(workers)}
+    process = subprocess.Popen([sys.executable, "-m", "src.server"], env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            for _ in range(120):
+                try:
+                    response = await client.get("/api/v1/docs")
+                    if response.status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.5)
+            else:
+                raise RuntimeError("uvicorn did not become ready in time")
+            yield client
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+async def run(args) -> dict:
+
+    item_uids, tag_names, volumes = await load_samples(args.sample_size)
+    if not item_uids:
+        raise SystemExit("the benchmark database is empty, run `python -m benchmarks.seed` first")
+
+    client_cm = asgi_client() if args.target == "asgi" else uvicorn_client(args.workers, args.port)
+    results = {}
+    async with client_cm as client:
+        ctx = BenchContext(headers={}, item_uids=item_uids, tag_names=tag_names)
+        response = await login(client, ctx)
+        response.raise_for_status()
+        ctx.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for name in args.scenarios:
+            if args.warmup:
+                await run_scenario(client, ctx, name, args.concurrency, args.warmup)
+            results[name] = await run_scenario(client, ctx, name, args.concurrency, args.duration)
+            print(f"{name}: {json.dumps(results[name])}")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "target": args.target,
+            "workers": args.workers if args.target == "uvicorn" else 1,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "python": platform.python_version(),
+            "git_commit": git_commit(),
+            "volumes": volumes,
+        },
+        "results": results,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API benchmark scenarios")
+    parser.add_argument("--target", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=list(SCENARIOS),
+        help=f"comma separated subset of: {','.join(SCENARIOS)}",
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of unrecorded warmup")
+    parser.add_argument("--sample-size", type=int, default=1000)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.seed import BENCH_EMAIL, BENCH_PASSWORD
+
+
+API_PREFIX = "/api/v1"
+
+
+@dataclass
+class BenchContext:
+    """State shared by all scenario calls of one run."""
+    headers: Dict[str, str]
+    item_uids: List[str]
+    tag_names: List[str]
+    rng: random.Random = field(default_factory=lambda: random.Random(0))
+
+
+async def login(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.post(
+        f"{API_PREFIX}/auth/login",
+        json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD},
+    )
+
+
+async def me(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.get(f"{API_PREFIX}/auth/me", headers=ctx.headers)
+
+
+async def list_items(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.get(f"{API_PREFIX}/items/", headers=ctx.headers)
+
+
+async def filter_items(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    params = {"tag": ctx.rng.choice(ctx.tag_names), "fields": "uid,title", "limit": 50}
+    return await client.get(f"{API_PREFIX}/items/", params=params, headers=ctx.headers)
+
+
+async def item_detail(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    item_uid = ctx.rng.choice(ctx.item_uids)
+    return await client.get(f"{API_PREFIX}/items/{item_uid}", headers=ctx.headers)
+
+
+async def lookup_items(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    uids = ctx.rng.sample(ctx.item_uids, k=min(100, len(ctx.item_uids)))
+    return await client.post(f"{API_PREFIX}/items/lookup", json={"uids": uids}, headers=ctx.headers)
+
+
+async def tag_item(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    item_uid = ctx.rng.choice(ctx.item_uids)
+    tags = [{"name": name} for name in ctx.rng.sample(ctx.tag_names, k=min(2, len(ctx.tag_names)))]
+    return await client.post(
+        f"{API_PREFIX}/tags/item/{item_uid}/tags", json={"tags": tags}, headers=ctx.headers
+    )
+
+
+async def add_note(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    item_uid = ctx.rng.choice(ctx.item_uids)
+    return await client.post(
+        f"{API_PREFIX}/notes/item/{item_uid}",
+        json={"note_text": "benchmark note"},
+        headers=ctx.headers,
+    )
+
+
+async def list_notes(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.get(f"{API_PREFIX}/notes/", headers=ctx.headers)
+
+
+Scenario = Callable[[httpx.AsyncClient, BenchContext], Awaitable[httpx.Response]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": login,
+    "me": me,
+    "list_items": list_items,
+    "filter_items": filter_items,
+    "item_detail": item_detail,
+    "lookup_items": lookup_items,
+    "tag_item": tag_item,
+    "add_note": add_note,
+    "list_notes": list_notes,
+}
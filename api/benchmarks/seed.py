@@ -0,0 +1,218 @@
+"""Seed the benchmark database with large synthetic datasets.
+
+Rows are generated by `benchmarks.datagen` (Zipfian tag popularity, Pareto
+distributed notes per item) and streamed with COPY from parallel worker
+processes, each holding its own connection. The dataset is fully determined
+by `--seed`, `--anchor-date`, `--chunk-size` and the volume arguments.
+Run `alembic upgrade head` against the benchmark database first.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from datetime import date, datetime, time as dtime
+
+from benchmarks.env import load_bench_env
+
+load_bench_env()
+
+import asyncpg  # noqa: E402
+
+from benchmarks.datagen import (  # noqa: E402
+    Distribution,
+    Volumes,
+    item_chunk_rows,
+    tag_rows,
+    user_rows,
+    zipf_cum_weights,
+)
+from src.config import Config  # noqa: E402
+from src.userauth.utils import generate_pwhash  # noqa: E402
+
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "benchmark"
+
+USER_COLUMNS = [
+    "uid", "username", "password_hash", "email", "first_name", "last_name",
+    "role", "is_verified", "created_at", "updated_at",
+]
+TAG_COLUMNS = ["uid", "name", "created_at"]
+ITEM_COLUMNS = [
+    "uid", "title", "owner", "stored_exp_date", "ph_number", "user_uid", "created_at", "updated_at",
+]
+ITEMTAG_COLUMNS = ["item_id", "tag_id", "item_created_at"]
+NOTE_COLUMNS = ["uid", "note_text", "user_uid", "item_uid", "created_at", "updated_at"]
+
+
+def asyncpg_dsn(url: str) -> str:
+    """asyncpg does not understand the SQLAlchemy `+driver` suffix."""
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+# ------------- worker process state --------------------------------------
+
+_worker = {}
+
+
+def _init_worker(vol: Volumes, dist: Distribution, password_hash: str):
+    loop = asyncio.new_event_loop()
+    _worker["loop"] = loop
+    _worker["vol"] = vol
+    _worker["dist"] = dist
+    _worker["password_hash"] = password_hash
+    _worker["tag_weights"] = zipf_cum_weights(vol.tags, dist.zipf_s) if vol.tags else []
+    _worker["conn"] = loop.run_until_complete(asyncpg.connect(asyncpg_dsn(Config.DATABASE_URL)))
+
+
+async def _copy(table: str, columns, rows):
+    if rows:
+        await _worker["conn"].copy_records_to_table(table, records=rows, columns=columns)
+
+
+def _load_users(bounds):
+    start, stop = bounds
+    rows = user_rows(_worker["vol"], _worker["dist"], start, stop, _worker["password_hash"], BENCH_EMAIL)
+    _worker["loop"].run_until_complete(_copy("users", USER_COLUMNS, rows))
+    return {"users": len(rows)}
+
+
+def _load_tags(bounds):
+    start, stop = bounds
+    rows = tag_rows(_worker["vol"], _worker["dist"], start, stop)
+    _worker["loop"].run_until_complete(_copy("tags", TAG_COLUMNS, rows))
+    return {"tags": len(rows)}
+
+
+def _load_items(bounds):
+    start, stop = bounds
+    items, links, notes, expired = item_chunk_rows(
+        _worker["vol"], _worker["dist"], start, stop, _worker["tag_weights"]
+    )
+
+    async def copy_chunk():
+        async with _worker["conn"].transaction():
+            await _copy("items", ITEM_COLUMNS, items)
+            await _copy("itemtag", ITEMTAG_COLUMNS, links)
+            await _copy("notes", NOTE_COLUMNS, notes)
+
+    _worker["loop"].run_until_complete(copy_chunk())
+    return {"items": len(items), "itemtag": len(links), "notes": len(notes), "expired": expired}
+
+
+# ------------- driver -----------------------------------------------------
+
+def chunks(total: int, size: int):
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+def run_phase(pool, name: str, func, total: int, chunk_size: int, totals: dict):
+    started = time.perf_counter()
+    for counts in pool.imap_unordered(func, chunks(total, chunk_size)):
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+    print(f"{name}: done in {time.perf_counter() - started:.1f}s ({totals})")
+
+
+async def prepare(truncate: bool):
+    conn = await asyncpg.connect(asyncpg_dsn(Config.DATABASE_URL))
+    try:
+        if truncate:
+            await conn.execute("TRUNCATE notes, itemtag, items, tags, users")
+    finally:
+        await conn.close()
+
+
+REBUILD_COUNTERS = """
+    TRUNCATE stat_counters;
+    INSERT INTO stat_counters (kind, key, value)
+    SELECT 'user_items', user_uid::text, count(*) FROM items
+    WHERE user_uid IS NOT NULL GROUP BY user_uid;
+    INSERT INTO stat_counters (kind, key, value)
+    SELECT 'item_notes', item_uid::text, count(*) FROM notes
+    WHERE item_uid IS NOT NULL GROUP BY item_uid;
+    INSERT INTO stat_counters (kind, key, value)
+    SELECT 'user_notes', user_uid::text, count(*) FROM notes
+    WHERE user_uid IS NOT NULL GROUP BY user_uid;
+    INSERT INTO stat_counters (kind, key, value)
+    SELECT 'tag_items', tag_id::text, count(*) FROM itemtag GROUP BY tag_id;
+    INSERT INTO stat_counters (kind, key, value)
+    SELECT 'expiring_week', date_trunc('week', stored_exp_date)::date::text, count(*) FROM items
+    GROUP BY date_trunc('week', stored_exp_date);
+"""
+
+
+async def finalize():
+    """COPY bypasses the write paths, so rebuild the aggregate counters here"""
+    conn = await asyncpg.connect(asyncpg_dsn(Config.DATABASE_URL))
+    try:
+        await conn.execute(REBUILD_COUNTERS)
+        await conn.execute("ANALYZE users, tags, items, itemtag, notes, stat_counters")
+    finally:
+        await conn.close()
+
+
+def seed(vol: Volumes, dist: Distribution, workers: int, chunk_size: int, truncate: bool):
+
+    asyncio.run(prepare(truncate))
+    password_hash = generate_pwhash(BENCH_PASSWORD)
+    totals = {}
+    started = time.perf_counter()
+
+    with multiprocessing.get_context("spawn").Pool(
+        processes=workers, initializer=_init_worker, initargs=(vol, dist, password_hash)
+    ) as pool:
+        # users and tags must exist before the items that reference them
+        run_phase(pool, "users", _load_users, vol.users, chunk_size, totals)
+        run_phase(pool, "tags", _load_tags, vol.tags, chunk_size, totals)
+        run_phase(pool, "items, links and notes", _load_items, vol.items, chunk_size, totals)
+
+    asyncio.run(finalize())
+    rows = sum(value for key, value in totals.items() if key != "expired")
+    elapsed = time.perf_counter() - started
+    print(f"seeded {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s), anchor {dist.anchor.date()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the benchmark database")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--tags", type=int, default=50_000)
+    parser.add_argument("--notes", type=int, default=5_000_000, help="approximate total, notes per item are skewed")
+    parser.add_argument("--tags-per-item", type=float, default=3.0, help="mean tag links per item")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="tag popularity exponent")
+    parser.add_argument("--notes-alpha", type=float, default=1.5, help="Pareto shape of notes per item")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--anchor-date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="date the generated timestamps are relative to (YYYY-MM-DD)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=20_000)
+    parser.add_argument("--no-truncate", action="store_true", help="keep existing rows")
+    args = parser.parse_args()
+
+    if args.notes_alpha <= 1:
+        parser.error("--notes-alpha must be greater than 1")
+
+    vol = Volumes(
+        users=max(1, args.users),
+        items=args.items,
+        tags=args.tags,
+        notes=args.notes,
+        tags_per_item=args.tags_per_item,
+    )
+    dist = Distribution(
+        seed=args.seed,
+        anchor=datetime.combine(args.anchor_date, dtime()),
+        zipf_s=args.zipf_s,
+        notes_alpha=args.notes_alpha,
+    )
+    seed(vol, dist, workers=args.workers, chunk_size=args.chunk_size, truncate=not args.no_truncate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Measure how long a fresh interpreter takes to import the app.
+
+Every sample runs ``import src`` in a new subprocess, the same cost each
+server worker pays when it spawns. The report lists the wall time
+percentiles, the slowest modules from ``python -X importtime`` and any heavy
+module that got imported although it should only load on first use. The
+exit status is 1 when the median exceeds ``--budget-ms`` or a heavy module
+was imported eagerly, so a CI step can keep the import cost in check.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.env import load_bench_env
+from benchmarks.run import git_commit, percentile
+
+
+# only needed once an email is sent or a password is checked
+LAZY_MODULES = ["celery", "fastapi_mail", "jinja2", "passlib"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"import_ms": elapsed * 1000, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def sample(module: str) -> dict:
+    code = PROBE.format(module=module, lazy=LAZY_MODULES)
+    output = subprocess.check_output([sys.executable, "-c", code], env=os.environ.copy(), text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, top: int) -> list[dict]:
+    """Modules with the largest cumulative import time, from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=os.environ.copy(), capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "cumulative_ms": round(int(cumulative) / 1000, 2)})
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of the app")
+    parser.add_argument("--module", default="src")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to report")
+    parser.add_argument("--budget-ms", type=float, help="fail when the median import time exceeds this")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    load_bench_env()
+    samples = [sample(args.module) for _ in range(args.runs)]
+    timings = sorted(s["import_ms"] for s in samples)
+    eager = sorted({name for s in samples for name in s["loaded"]})
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "module": args.module,
+            "runs": args.runs,
+            "python": platform.python_version(),
+            "git_commit": git_commit(),
+        },
+        "results": {
+            "median_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "min_ms": round(timings[0], 2),
+            "max_ms": round(timings[-1], 2),
+            "eager_heavy_modules": eager,
+            "slowest_imports": slowest_imports(args.module, args.top),
+        },
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    over_budget = args.budget_ms is not None and report["results"]["median_ms"] > args.budget_ms
+    if over_budget or eager:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
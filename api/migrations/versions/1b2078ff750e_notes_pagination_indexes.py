@@ -0,0 +1,33 @@
+"""notes pagination indexes
+
+Revision ID: 1b2078ff750e
+Revises: 3a8e4c161a6f
+Create Date: 2026-10-19 17:20:48.660193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b2078ff750e'
+down_revision: Union[str, Sequence[str], None] = '3a8e4c161a6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_notes_item_uid_created_at_uid', 'notes', ['item_uid', 'created_at', 'uid'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_notes_created_at_uid', 'notes', ['created_at', 'uid'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_notes_created_at_uid', table_name='notes', postgresql_concurrently=True)
+        op.drop_index('ix_notes_item_uid_created_at_uid', table_name='notes', postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""item list filter indexes
+
+Revision ID: 3a8e4c161a6f
+Revises: b6f8f97e44ba
+Create Date: 2026-10-19 16:37:05.218840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a8e4c161a6f'
+down_revision: Union[str, Sequence[str], None] = 'b6f8f97e44ba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# the tag filter is served by ix_tags_live_name and the itemtag primary key,
+# the created_at range by ix_items_live_created_at_uid
+INDEXES = {
+    'ix_items_live_owner': ['owner'],
+    'ix_items_live_stored_exp_date': ['stored_exp_date'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'items', columns, unique=False,
+                            postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='items', postgresql_concurrently=True)
@@ -0,0 +1,32 @@
+"""add version columns
+
+Revision ID: 536a5db81878
+Revises: e8afe683dcd4
+Create Date: 2026-10-19 13:05:52.661930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '536a5db81878'
+down_revision: Union[str, Sequence[str], None] = 'e8afe683dcd4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # constant server default, so this is a catalog-only change on postgres 11+
+    op.add_column('items', sa.Column('version', postgresql.INTEGER(), server_default='1', nullable=False))
+    op.add_column('tags', sa.Column('version', postgresql.INTEGER(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tags', 'version')
+    op.drop_column('items', 'version')
@@ -0,0 +1,42 @@
+"""user profile counters
+
+Revision ID: 5d4c344c89f0
+Revises: 1b2078ff750e
+Create Date: 2026-10-19 18:02:13.945127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d4c344c89f0'
+down_revision: Union[str, Sequence[str], None] = '1b2078ff750e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # notes on live items, the same rows /auth/me pages through
+    op.execute("""
+        INSERT INTO stat_counters (kind, key, value)
+        SELECT 'user_notes', n.user_uid::text, count(*) FROM notes n
+        JOIN items i ON i.uid = n.item_uid AND i.deleted_at IS NULL
+        WHERE n.user_uid IS NOT NULL GROUP BY n.user_uid
+        ON CONFLICT (kind, key) DO UPDATE SET value = EXCLUDED.value
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_email', 'users', ['email'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_notes_user_uid_created_at_uid', 'notes', ['user_uid', 'created_at', 'uid'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_notes_user_uid_created_at_uid', table_name='notes', postgresql_concurrently=True)
+        op.drop_index('ix_users_email', table_name='users', postgresql_concurrently=True)
+    op.execute("DELETE FROM stat_counters WHERE kind = 'user_notes'")
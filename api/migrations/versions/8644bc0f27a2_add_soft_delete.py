@@ -0,0 +1,49 @@
+"""add soft delete
+
+Revision ID: 8644bc0f27a2
+Revises: 536a5db81878
+Create Date: 2026-10-19 14:21:44.107356
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8644bc0f27a2'
+down_revision: Union[str, Sequence[str], None] = '536a5db81878'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('items', sa.Column('deleted_at', postgresql.TIMESTAMP(), nullable=True))
+    op.add_column('tags', sa.Column('deleted_at', postgresql.TIMESTAMP(), nullable=True))
+
+    # built concurrently so the hot tables stay writable during the upgrade
+    with op.get_context().autocommit_block():
+        op.create_index('ix_items_live_created_at', 'items', ['created_at'], unique=False,
+                        postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True)
+        op.create_index('ix_items_deleted_at', 'items', ['deleted_at'], unique=False,
+                        postgresql_where=sa.text('deleted_at IS NOT NULL'), postgresql_concurrently=True)
+        op.create_index('ix_tags_live_name', 'tags', ['name'], unique=False,
+                        postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True)
+        op.create_index('ix_tags_deleted_at', 'tags', ['deleted_at'], unique=False,
+                        postgresql_where=sa.text('deleted_at IS NOT NULL'), postgresql_concurrently=True)
+        op.create_index('ix_itemtag_tag_id_item_id', 'itemtag', ['tag_id', 'item_id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_itemtag_tag_id_item_id', table_name='itemtag')
+    op.drop_index('ix_tags_deleted_at', table_name='tags')
+    op.drop_index('ix_tags_live_name', table_name='tags')
+    op.drop_index('ix_items_deleted_at', table_name='items')
+    op.drop_index('ix_items_live_created_at', table_name='items')
+    op.drop_column('tags', 'deleted_at')
+    op.drop_column('items', 'deleted_at')
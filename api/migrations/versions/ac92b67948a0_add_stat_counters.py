@@ -0,0 +1,57 @@
+"""add stat counters
+
+Revision ID: ac92b67948a0
+Revises: 89a87cf18176
+Create Date: 2026-10-19 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ac92b67948a0'
+down_revision: Union[str, Sequence[str], None] = '89a87cf18176'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stat_counters',
+    sa.Column('kind', sa.VARCHAR(), nullable=False),
+    sa.Column('key', sa.VARCHAR(), nullable=False),
+    sa.Column('value', postgresql.BIGINT(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'key')
+    )
+    op.create_index('ix_stat_counters_kind_value', 'stat_counters', ['kind', 'value'], unique=False)
+
+    # backfill from the existing rows, from here on the write paths keep them current
+    op.execute("""
+        INSERT INTO stat_counters (kind, key, value)
+        SELECT 'user_items', user_uid::text, count(*) FROM items
+        WHERE user_uid IS NOT NULL GROUP BY user_uid
+    """)
+    op.execute("""
+        INSERT INTO stat_counters (kind, key, value)
+        SELECT 'item_notes', item_uid::text, count(*) FROM notes
+        WHERE item_uid IS NOT NULL GROUP BY item_uid
+    """)
+    op.execute("""
+        INSERT INTO stat_counters (kind, key, value)
+        SELECT 'tag_items', tag_id::text, count(*) FROM itemtag GROUP BY tag_id
+    """)
+    op.execute("""
+        INSERT INTO stat_counters (kind, key, value)
+        SELECT 'expiring_week', date_trunc('week', stored_exp_date)::date::text, count(*) FROM items
+        GROUP BY date_trunc('week', stored_exp_date)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stat_counters_kind_value', table_name='stat_counters')
+    op.drop_table('stat_counters')
@@ -0,0 +1,84 @@
+"""uuid7 primary keys
+
+Revision ID: b6f8f97e44ba
+Revises: 8644bc0f27a2
+Create Date: 2026-10-19 15:48:10.532871
+
+New rows get time-ordered version 7 uids, from the application (src.db.uuid7)
+or from the uuid_generate_v7() server default for rows inserted in SQL.
+Existing uuid4 keys are left untouched and stay valid. They carry no time
+information, so listings page on (created_at, uid) rather than on the uid
+alone, which keeps old and new rows in creation order. Tag links get a copy
+of their item's created_at, so a tag's items page in the same order off the
+itemtag index.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f8f97e44ba'
+down_revision: Union[str, Sequence[str], None] = '8644bc0f27a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ['users', 'items', 'tags', 'notes']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # unix ms timestamp over the first 48 bits of a random uuid, version bits 0100 -> 0111
+    op.execute("""
+        CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+            SELECT encode(
+                set_bit(
+                    set_bit(
+                        overlay(uuid_send(gen_random_uuid())
+                                placing substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                                FROM 1 FOR 6),
+                        52, 1),
+                    53, 1),
+                'hex')::uuid
+        $$ LANGUAGE sql VOLATILE
+    """)
+    for table in TABLES:
+        op.alter_column(table, 'uid', server_default=sa.text('uuid_generate_v7()'))
+
+    op.add_column('itemtag', sa.Column('item_created_at', postgresql.TIMESTAMP(), nullable=True))
+    op.execute("""
+        UPDATE itemtag it SET item_created_at = i.created_at
+        FROM items i WHERE i.uid = it.item_id
+    """)
+
+    # the uid breaks created_at ties, so every listing is one index range scan
+    with op.get_context().autocommit_block():
+        op.create_index('ix_items_live_created_at_uid', 'items', ['created_at', 'uid'], unique=False,
+                        postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True)
+        op.drop_index('ix_items_live_created_at', table_name='items', postgresql_concurrently=True)
+        op.create_index('ix_items_user_uid_created_at_uid', 'items', ['user_uid', 'created_at', 'uid'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_itemtag_tag_id_item_created_at_item_id', 'itemtag',
+                        ['tag_id', 'item_created_at', 'item_id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_itemtag_tag_id_item_id', table_name='itemtag', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_itemtag_tag_id_item_id', 'itemtag', ['tag_id', 'item_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.drop_index('ix_itemtag_tag_id_item_created_at_item_id', table_name='itemtag',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_items_user_uid_created_at_uid', table_name='items', postgresql_concurrently=True)
+        op.create_index('ix_items_live_created_at', 'items', ['created_at'], unique=False,
+                        postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True)
+        op.drop_index('ix_items_live_created_at_uid', table_name='items', postgresql_concurrently=True)
+    op.drop_column('itemtag', 'item_created_at')
+    for table in TABLES:
+        op.alter_column(table, 'uid', server_default=None)
+    op.execute("DROP FUNCTION IF EXISTS uuid_generate_v7()")
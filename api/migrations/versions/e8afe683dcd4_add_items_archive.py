@@ -0,0 +1,47 @@
+"""add items archive
+
+Revision ID: e8afe683dcd4
+Revises: ac92b67948a0
+Create Date: 2026-10-19 11:40:07.918245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8afe683dcd4'
+down_revision: Union[str, Sequence[str], None] = 'ac92b67948a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # monthly partitions are created on demand by the archival job
+    op.create_table('items_archive',
+    sa.Column('uid', postgresql.UUID(), nullable=False),
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('owner', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('stored_exp_date', postgresql.DATE(), nullable=False),
+    sa.Column('ph_number', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('user_uid', postgresql.UUID(), nullable=True),
+    sa.Column('created_at', postgresql.TIMESTAMP(), nullable=True),
+    sa.Column('updated_at', postgresql.TIMESTAMP(), nullable=True),
+    sa.Column('archived_at', postgresql.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('notes', postgresql.JSONB(), server_default='[]', nullable=False),
+    sa.Column('tags', postgresql.JSONB(), server_default='[]', nullable=False),
+    sa.PrimaryKeyConstraint('uid', 'stored_exp_date'),
+    postgresql_partition_by='RANGE (stored_exp_date)'
+    )
+    op.create_index('ix_items_archive_user_uid', 'items_archive', ['user_uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_items_archive_user_uid', table_name='items_archive')
+    op.drop_table('items_archive')
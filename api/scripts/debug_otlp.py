@@ -0,0 +1,94 @@
+"""Local OTLP/HTTP collector stand-in for looking at the API's traces.
+
+Accepts the JSON encoding of OTLP trace exports on /v1/traces, prints one
+line per span, indented under its parent when both arrive in the same
+batch, and with --output appends every span to a JSON lines file. Point the
+API and the workers at it with:
+
+    TRACING_EXPORTER=otlp TRACING_OTLP_ENDPOINT=http://localhost:4318/v1/traces
+
+Run it from the `api/` directory:
+
+    python scripts/debug_otlp.py --port 4318 --output /tmp/spans.jsonl
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def flatten(payload: dict) -> list[dict]:
+    spans = []
+    for resource_spans in payload.get("resourceSpans", []):
+        attributes = resource_spans.get("resource", {}).get("attributes", [])
+        service = next(
+            (a["value"].get("stringValue") for a in attributes if a["key"] == "service.name"), "unknown"
+        )
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for span in scope_spans.get("spans", []):
+                spans.append({"service": service, **span})
+    return spans
+
+
+def print_spans(spans: list[dict]):
+    by_parent: dict[str | None, list[dict]] = {}
+    ids = {span["spanId"] for span in spans}
+    for span in spans:
+        parent = span.get("parentSpanId")
+        by_parent.setdefault(parent if parent in ids else None, []).append(span)
+
+    def show(span: dict, depth: int):
+        duration = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+        failed = " ERROR" if span.get("status", {}).get("code") == 2 else ""
+        print(f"{span['traceId'][:8]} {'  ' * depth}{span['name']} [{span['service']}] {duration:.2f}ms{failed}")
+        for child in sorted(by_parent.get(span["spanId"], []), key=lambda s: int(s["startTimeUnixNano"])):
+            show(child, depth + 1)
+
+    for root in sorted(by_parent.get(None, []), key=lambda s: int(s["startTimeUnixNano"])):
+        show(root, 0)
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    output: str | None = None
+
+    def do_POST(self):
+        if self.path != "/v1/traces":
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            spans = flatten(json.loads(body))
+        except ValueError:
+            self.send_error(400, "expected OTLP JSON")
+            return
+        print_spans(spans)
+        if self.output:
+            with open(self.output, "a") as f:
+                f.write("".join(json.dumps(span) + "\n" for span in spans))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OTLP/HTTP collector that prints the spans it receives")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output", help="also append every span to this JSON lines file")
+    args = parser.parse_args()
+
+    CollectorHandler.output = args.output
+    server = ThreadingHTTPServer((args.host, args.port), CollectorHandler)
+    print(f"debug OTLP collector listening on http://{args.host}:{args.port}/v1/traces")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Local SMTP stand-in for trying the mail backends without a real server.
+
+Accepts every message, prints a one-line summary and, with --maildir,
+writes each message to a .eml file. No TLS and no AUTH, so point the API
+at it with:
+
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_STARTTLS=False USE_CREDENTIALS=False
+
+Run it from the `api/` directory:
+
+    python scripts/debug_smtp.py --port 1025 --maildir /tmp/mail
+
+--fail-rate makes it answer a share of messages with a temporary 451 error,
+to watch the retry and backoff of MAIL_BACKEND=inprocess.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+from email import message_from_bytes
+from pathlib import Path
+
+
+class DebugSMTPServer:
+
+    def __init__(self, maildir: Path | None, fail_rate: float):
+        self.maildir = maildir
+        self.fail_rate = fail_rate
+        self.counter = itertools.count(1)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 debug-smtp ready")
+        sender, recipients = None, []
+        try:
+            while line := await reader.readline():
+                command, _, argument = line.decode(errors="replace").rstrip("\r\n").partition(" ")
+                command = command.upper()
+                if command in ("EHLO", "HELO"):
+                    await reply("250 debug-smtp")
+                elif command == "MAIL":
+                    sender, recipients = argument, []
+                    await reply("250 OK")
+                elif command == "RCPT":
+                    recipients.append(argument)
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = await self.read_data(reader)
+                    if random.random() < self.fail_rate:
+                        await reply("451 Temporary failure, try again")
+                    else:
+                        self.store(sender, recipients, data)
+                        await reply("250 OK")
+                    sender, recipients = None, []
+                elif command == "RSET":
+                    sender, recipients = None, []
+                    await reply("250 OK")
+                elif command == "NOOP":
+                    await reply("250 OK")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+    async def read_data(self, reader: asyncio.StreamReader) -> bytes:
+        lines = []
+        while (line := await reader.readline()) not in (b".\r\n", b""):
+            # undo dot stuffing
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines)
+
+    def store(self, sender: str, recipients: list[str], data: bytes):
+        number = next(self.counter)
+        message = message_from_bytes(data)
+        print(f"#{number} {sender} -> {', '.join(recipients)}: {message['Subject']!r} ({len(data)} bytes)")
+        if self.maildir is not None:
+            (self.maildir / f"{number:06d}.eml").write_bytes(data)
+
+
+async def serve(args):
+    maildir = Path(args.maildir) if args.maildir else None
+    if maildir is not None:
+        maildir.mkdir(parents=True, exist_ok=True)
+    smtp = DebugSMTPServer(maildir, args.fail_rate)
+    server = await asyncio.start_server(smtp.handle, args.host, args.port)
+    print(f"debug SMTP server listening on {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in that accepts and prints every message")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--maildir", help="also write every message to a .eml file in this directory")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of messages answered with 451")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,71 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from src.items.routes import item_router
 from src.userauth.routes import auth_router
 from src.notes.routes import notes_router
 from src.tags.routes import tags_router
+from src.stats.routes import stats_router
+from src.archive.routes import archive_router
+from src.events.routes import events_router
+from src.events.feed import change_feed
+from src.health.routes import health_router
+from src.health.checker import health_checker
+from src.db.main import get_engine, close_engine
+from src.db.redis import get_redis, close_redis
 from src.errors import register_error_handlers
 from src.middleware import register_middleware
+from src.metrics import metrics_app
+from src.logging import setup_logging
+from src.config import Config
+from src.tracing import tracer
 
 
 version = "v1"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    # opened here rather than at import so every server worker gets its own
+    # pool and client after the fork
+    get_engine()
+    get_redis()
+    health_checker.start()
+    if Config.MAIL_BACKEND == "inprocess":
+        from src.mail_queue import mail_queue
+        mail_queue.start()
+    yield
+    if Config.MAIL_BACKEND == "inprocess":
+        # deliver what is still queued before the worker exits
+        await mail_queue.close()
+    await health_checker.close()
+    await change_feed.close()
+    await close_redis()
+    await close_engine()
+    tracer.shutdown()
+
+
 app = FastAPI(
     version=version,
     title="Warehouse Management API",
     description="API to manage items in warehouse",
-    docs_url=f"/api/{version}/docs"
+    docs_url=f"/api/{version}/docs",
+    lifespan=lifespan,
 )
 
 register_error_handlers(app)
 register_middleware(app)
 
+app.mount("/metrics", metrics_app())
+
+app.include_router(health_router, tags=["Health"])
 app.include_router(item_router, prefix=f"/api/{version}/items", tags=["Items"])
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["Auth"])
 app.include_router(notes_router, prefix=f"/api/{version}/notes", tags=["Notes"])
 app.include_router(tags_router, prefix=f"/api/{version}/tags", tags=["Tags"])
+app.include_router(stats_router, prefix=f"/api/{version}/stats", tags=["Stats"])
+app.include_router(archive_router, prefix=f"/api/{version}/archive", tags=["Archive"])
+app.include_router(events_router, prefix=f"/api/{version}/events", tags=["Events"])
 
 
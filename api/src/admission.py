@@ -0,0 +1,122 @@
+import asyncio
+import math
+from fastapi import Depends, Request
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.main import get_session
+from src.db.redis import take_rate_limit_token
+from src.errors import ServiceOverloaded, RateLimitExceeded
+from src.userauth.utils import decode_token
+from src.logging import logger
+
+
+class AdmissionControl:
+    """Caps how many requests of one route run at the same time in this worker.
+
+    Requests wait at most `queue_timeout` seconds for a slot, after that they
+    are shed with a 503 so expensive routes can't exhaust the DB pool and
+    slow every other route down with them.
+    """
+    def __init__(self, name: str, limit: int | None = None, queue_timeout: float | None = None) -> None:
+        self.name = name
+        self._limit = limit
+        self._queue_timeout = queue_timeout
+        # sized on the first request, when the settings are read
+        self._slots: asyncio.Semaphore | None = None
+
+    @property
+    def limit(self) -> int:
+        return self._limit or Config.ADMISSION_LIMITS.get(self.name, Config.ADMISSION_DEFAULT_LIMIT)
+
+    @property
+    def queue_timeout(self) -> float:
+        if self._queue_timeout is not None:
+            return self._queue_timeout
+        return Config.ADMISSION_QUEUE_TIMEOUTS.get(self.name, Config.ADMISSION_DEFAULT_QUEUE_TIMEOUT)
+
+    async def __call__(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Admission control: shedding {self.name} request after {self.queue_timeout}s in queue")
+            raise ServiceOverloaded(retry_after=Config.ADMISSION_RETRY_AFTER)
+
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+
+class RateLimiter:
+    """Redis token bucket shared by all workers, keyed per user or per client IP.
+
+    `scope="user"` falls back to the client IP when the request carries no
+    valid access token. If Redis is unavailable the request is let through.
+    """
+    def __init__(self, name: str, scope: str = "user", rate: float | None = None, burst: int | None = None) -> None:
+        if scope not in ("user", "ip"):
+            raise ValueError("scope must be 'user' or 'ip'")
+        self.name = name
+        self.scope = scope
+        self._rate = rate
+        self._burst = burst
+
+    @property
+    def rate(self) -> float:
+        return self._rate or (Config.RATE_LIMIT_USER_RATE if self.scope == "user" else Config.RATE_LIMIT_IP_RATE)
+
+    @property
+    def burst(self) -> int:
+        return self._burst or (Config.RATE_LIMIT_USER_BURST if self.scope == "user" else Config.RATE_LIMIT_IP_BURST)
+
+    def identity(self, request: Request) -> str:
+        if self.scope == "user":
+            scheme, _, token = request.headers.get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                token_data = decode_token(token)
+                if token_data:
+                    return f"user:{token_data['user']['user_uid']}"
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    async def __call__(self, request: Request) -> None:
+        if not Config.RATE_LIMIT_ENABLED:
+            return
+
+        key = f"ratelimit:{self.name}:{self.identity(request)}"
+        try:
+            allowed, retry_after = await take_rate_limit_token(key, self.rate, self.burst)
+        except Exception as e:
+            logger.error(f"Rate limiter unavailable, letting request through: {e}")
+            return
+
+        if not allowed:
+            logger.error(f"Rate limit exceeded for {key}")
+            raise RateLimitExceeded(retry_after=max(1, math.ceil(retry_after)))
+
+
+
+class StatementTimeout:
+    """Per-route statement_timeout budget, in milliseconds.
+
+    Queries running past it are cancelled by Postgres and the request fails
+    with a 504 instead of holding its pooled connection indefinitely. Routes
+    without one get STATEMENT_TIMEOUT_DEFAULT.
+    """
+    def __init__(self, name: str, timeout_ms: int | None = None) -> None:
+        self.name = name
+        self._timeout_ms = timeout_ms
+
+    @property
+    def timeout_ms(self) -> int:
+        return self._timeout_ms or Config.STATEMENT_TIMEOUTS.get(self.name, Config.STATEMENT_TIMEOUT_DEFAULT)
+
+    async def __call__(self, session: AsyncSession = Depends(get_session)) -> None:
+        session.info["statement_timeout"] = self.timeout_ms
+        session.info["statement_timeout_budget"] = self.name
+        if session.in_transaction():
+            # later transactions pick the budget up in after_begin
+            await session.exec(text(f"SET LOCAL statement_timeout = {int(self.timeout_ms)}"))
@@ -0,0 +1,48 @@
+import uuid
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.main import get_session
+from src.userauth.dependencies import RoleChecker
+from .schemas import ArchivedItem, ArchivedItemDetails
+from .services import ArchiveService
+from src.errors import ItemNotFound
+from src.logging import logger
+
+
+# "/archive"
+archive_router = APIRouter()
+archive_service = ArchiveService()
+user_role_checker = Depends(RoleChecker(["user", "admin"]))
+
+
+@archive_router.get("/items", response_model=List[ArchivedItem], dependencies=[user_role_checker])
+async def get_archived_items(
+    user_uid: Optional[uuid.UUID] = None,
+    exp_from: Optional[date] = None,
+    exp_to: Optional[date] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    session: AsyncSession = Depends(get_session),
+):
+
+    logger.info("Getting archived items: processing request..")
+    items = await archive_service.get_archived_items(
+        session, user_uid=user_uid, exp_from=exp_from, exp_to=exp_to, limit=limit, offset=offset
+    )
+    logger.info("Getting archived items: returning result..")
+    return items
+
+
+@archive_router.get("/items/{item_uid}", response_model=ArchivedItemDetails, status_code=status.HTTP_200_OK, dependencies=[user_role_checker])
+async def get_archived_item(item_uid: uuid.UUID, session: AsyncSession = Depends(get_session)):
+
+    logger.info(f"Getting archived item {item_uid}: processing request..")
+    item = await archive_service.get_archived_item(item_uid, session)
+    if item:
+        logger.info("Getting archived item: returning result..")
+        return item
+    logger.error("Getting archived item: item not found")
+    raise ItemNotFound()
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+import uuid
+from datetime import datetime, date
+from typing import List, Optional
+
+
+class ArchivedNote(BaseModel):
+    uid: uuid.UUID
+    note_text: str
+    user_uid: Optional[uuid.UUID]
+    created_at: datetime
+    updated_at: datetime
+
+class ArchivedTag(BaseModel):
+    uid: uuid.UUID
+    name: str
+
+class ArchivedItem(BaseModel):
+    uid: uuid.UUID
+    title: str
+    owner: str
+    stored_exp_date: date
+    ph_number: str
+    user_uid: Optional[uuid.UUID]
+    created_at: datetime
+    updated_at: datetime
+    archived_at: datetime
+
+class ArchivedItemDetails(ArchivedItem):
+    notes: List[ArchivedNote]
+    tags: List[ArchivedTag]
@@ -0,0 +1,169 @@
+from datetime import date, timedelta
+from sqlalchemy import text
+from sqlmodel import select, desc
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.models import ItemArchive
+from src.stats.services import StatsService, USER_ITEMS, USER_NOTES, ITEM_NOTES, TAG_ITEMS, EXPIRING_WEEK, expiring_week_key
+from src.logging import logger
+
+
+stats_service = StatsService()
+
+
+# Moves one batch of expired items together with their notes and tag links.
+# All DELETEs run in one statement, so the foreign keys between them are
+# checked only once the whole batch is gone.
+ARCHIVE_BATCH = text("""
+WITH batch AS (
+    SELECT uid FROM items
+    WHERE stored_exp_date < :cutoff AND deleted_at IS NULL
+    ORDER BY stored_exp_date
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+),
+moved_notes AS (
+    DELETE FROM notes n USING batch b WHERE n.item_uid = b.uid
+    RETURNING n.uid, n.note_text, n.user_uid, n.item_uid, n.created_at, n.updated_at
+),
+moved_links AS (
+    DELETE FROM itemtag it USING batch b WHERE it.item_id = b.uid
+    RETURNING it.item_id, it.tag_id
+),
+moved_items AS (
+    DELETE FROM items i USING batch b WHERE i.uid = b.uid
+    RETURNING i.uid, i.title, i.owner, i.stored_exp_date, i.ph_number, i.user_uid,
+              i.created_at, i.updated_at
+),
+notes_by_item AS (
+    SELECT item_uid, jsonb_agg(jsonb_build_object(
+        'uid', uid, 'note_text', note_text, 'user_uid', user_uid,
+        'created_at', created_at, 'updated_at', updated_at
+    ) ORDER BY created_at) AS notes
+    FROM moved_notes GROUP BY item_uid
+),
+tags_by_item AS (
+    SELECT ml.item_id, jsonb_agg(jsonb_build_object('uid', t.uid, 'name', t.name)) AS tags
+    FROM moved_links ml JOIN tags t ON t.uid = ml.tag_id AND t.deleted_at IS NULL
+    GROUP BY ml.item_id
+)
+INSERT INTO items_archive (uid, title, owner, stored_exp_date, ph_number, user_uid,
+                           created_at, updated_at, archived_at, notes, tags)
+SELECT mi.uid, mi.title, mi.owner, mi.stored_exp_date, mi.ph_number, mi.user_uid,
+       mi.created_at, mi.updated_at, now(),
+       COALESCE(nb.notes, '[]'::jsonb), COALESCE(tb.tags, '[]'::jsonb)
+FROM moved_items mi
+LEFT JOIN notes_by_item nb ON nb.item_uid = mi.uid
+LEFT JOIN tags_by_item tb ON tb.item_id = mi.uid
+RETURNING uid, user_uid, stored_exp_date, tags, notes
+""")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class ArchiveService:
+
+    async def ensure_partitions(self, cutoff: date, session: AsyncSession):
+        """Create the monthly partitions every expired item will need"""
+
+        result = await session.exec(
+            text("SELECT min(stored_exp_date) FROM items WHERE stored_exp_date < :cutoff AND deleted_at IS NULL"),
+            params={"cutoff": cutoff},
+        )
+        oldest = result.scalar()
+        if oldest is None:
+            return
+
+        month = month_start(oldest)
+        while month < cutoff:
+            end = next_month(month)
+            await session.exec(text(
+                f"CREATE TABLE IF NOT EXISTS items_archive_y{month:%Y}m{month:%m} "
+                f"PARTITION OF items_archive FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            month = end
+        await session.commit()
+
+
+    async def archive_batch(self, cutoff: date, batch_size: int, session: AsyncSession) -> int:
+
+        result = await session.exec(ARCHIVE_BATCH, params={"cutoff": cutoff, "batch_size": batch_size})
+        archived = result.all()
+        if not archived:
+            await session.commit()
+            return 0
+
+        changes = []
+        for row in archived:
+            changes.append((USER_ITEMS, row.user_uid, -1))
+            changes.append((EXPIRING_WEEK, expiring_week_key(row.stored_exp_date), -1))
+            changes += [(TAG_ITEMS, tag["uid"], -1) for tag in row.tags]
+            changes += [(USER_NOTES, note["user_uid"], -1) for note in row.notes]
+        await stats_service.bump(changes, session)
+        await stats_service.drop_many(ITEM_NOTES, [row.uid for row in archived], session)
+        await session.commit()
+        return len(archived)
+
+
+    async def archive_expired(self, cutoff: date, batch_size: int, max_batches: int, session: AsyncSession) -> int:
+
+        try:
+            logger.info(f"Archiving expired items before {cutoff}: moving data to archive..")
+            await self.ensure_partitions(cutoff, session)
+            total = 0
+            for _ in range(max_batches):
+                moved = await self.archive_batch(cutoff, batch_size, session)
+                total += moved
+                if moved < batch_size:
+                    break
+            logger.info(f"Archiving expired items: archived {total} items")
+            return total
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
+
+
+    async def get_archived_items(
+        self,
+        session: AsyncSession,
+        user_uid: str | None = None,
+        exp_from: date | None = None,
+        exp_to: date | None = None,
+        limit: int = 50,
+        offset: int = 0,
+    ):
+
+        try:
+            logger.info("Getting archived items: getting data from databases..")
+            query = select(ItemArchive)
+            # stored_exp_date bounds let the planner prune partitions
+            if exp_from is not None:
+                query = query.where(ItemArchive.stored_exp_date >= exp_from)
+            if exp_to is not None:
+                query = query.where(ItemArchive.stored_exp_date < exp_to)
+            if user_uid is not None:
+                query = query.where(ItemArchive.user_uid == user_uid)
+            query = query.order_by(desc(ItemArchive.stored_exp_date), ItemArchive.uid).offset(offset).limit(limit)
+            results = await session.exec(query)
+            return results.all()
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
+
+
+    async def get_archived_item(self, item_uid: str, session: AsyncSession):
+
+        try:
+            logger.info("Getting archived item: getting data from databases..")
+            query = select(ItemArchive).where(ItemArchive.uid == item_uid)
+            result = await session.exec(query)
+            return result.first()
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
@@ -0,0 +1,53 @@
+"""Celery settings, loaded by the worker and beat through
+`c_app.config_from_object("src.celery_config")`. Kept out of src.config so
+importing settings never imports celery."""
+from celery.schedules import crontab
+from kombu import Queue
+
+from src.config import Config
+
+
+broker_url = Config.REDIS_URL
+
+result_backend = Config.REDIS_URL
+
+broker_connection_retry_on_startup = True
+
+# verification and reset mails never wait behind a bulk send or a purge run,
+# each queue can get its own workers (see docker-compose.yaml)
+MAIL_HIGH_QUEUE = "mail.high"
+MAIL_BULK_QUEUE = "mail.bulk"
+MAINTENANCE_QUEUE = "maintenance"
+
+task_queues = (
+    Queue(MAIL_HIGH_QUEUE),
+    Queue(MAIL_BULK_QUEUE),
+    Queue(MAINTENANCE_QUEUE),
+)
+
+task_default_queue = MAINTENANCE_QUEUE
+
+task_routes = {
+    "src.celery_task.send_email": {"queue": MAIL_HIGH_QUEUE},
+    "src.celery_task.send_bulk_email": {"queue": MAIL_BULK_QUEUE},
+    "src.celery_task.archive_expired_items": {"queue": MAINTENANCE_QUEUE},
+    "src.celery_task.purge_deleted_rows": {"queue": MAINTENANCE_QUEUE},
+}
+
+# one task reserved per process at a time, so a long bulk chunk can't sit on
+# tasks another idle process could run
+worker_prefetch_multiplier = Config.CELERY_PREFETCH_MULTIPLIER
+
+# 0 leaves it to celery, one process per CPU
+worker_concurrency = Config.CELERY_CONCURRENCY or None
+
+beat_schedule = {
+    "archive-expired-items": {
+        "task": "src.celery_task.archive_expired_items",
+        "schedule": crontab(hour=Config.ARCHIVE_HOUR, minute=0),
+    },
+    "purge-deleted-rows": {
+        "task": "src.celery_task.purge_deleted_rows",
+        "schedule": crontab(hour=Config.PURGE_HOUR, minute=0),
+    },
+}
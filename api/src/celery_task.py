@@ -1,13 +1,147 @@
 from celery import Celery
+from celery.signals import (
+    after_task_publish,
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutdown,
+)
 from asgiref.sync import async_to_sync
+from datetime import date, datetime, timedelta
+import threading
 
-from src.mail import create_message, mail
+from src.config import Config
+from src.mail import chunked, create_message, get_mail
+from src.mail_templates import precompile_templates, render_email
+from src.celery_config import MAIL_BULK_QUEUE
+from src.db.main import task_session
+from src.archive.services import ArchiveService
+from src.items.services import ItemsService
+from src.tags.services import TagService
+from src.logging import setup_logging
+from src.heartbeat import WorkerHeartbeat
+from src.tracing import tracer
 
 c_app = Celery()
 
-c_app.config_from_object("src.config")
+c_app.config_from_object("src.celery_config")
 
-@c_app.task()
-def send_email(recipients: list[str], subject: str, html_message: str):
+archive_service = ArchiveService()
+item_service = ItemsService()
+tag_service = TagService()
+worker_heartbeat = WorkerHeartbeat(Config.WORKER_HEARTBEAT_INTERVAL, Config.WORKER_HEARTBEAT_TTL)
+_publishing = threading.local()
+
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    setup_logging()
+    precompile_templates()
+
+
+@worker_process_shutdown.connect
+def _flush_spans(**kwargs):
+    tracer.shutdown()
+
+
+@before_task_publish.connect
+def _start_publish_span(sender=None, headers=None, **kwargs):
+    """Producer span around the broker publish, its traceparent goes into the
+    task headers so the task's span continues the publisher's trace"""
+    span = tracer.begin(f"celery.publish {sender}", kind="producer")
+    headers["traceparent"] = span.traceparent
+    _publishing.span = span
+
+
+@after_task_publish.connect
+def _end_publish_span(**kwargs):
+    span = getattr(_publishing, "span", None)
+    if span is not None:
+        _publishing.span = None
+        tracer.end(span)
+
+
+@task_prerun.connect
+def _start_task_span(task_id=None, task=None, **kwargs):
+    traceparent = task.request.get("traceparent") or (task.request.headers or {}).get("traceparent")
+    span = tracer.begin(f"celery.task {task.name}", kind="consumer", traceparent=traceparent,
+                        attributes={"celery.task_id": task_id})
+    task.request.trace_span = span
+    task.request.trace_token = tracer.activate(span)
+
+
+@task_postrun.connect
+def _end_task_span(task=None, state=None, **kwargs):
+    span = getattr(task.request, "trace_span", None)
+    if span is None:
+        return
+    if state == "FAILURE":
+        span.error = "task failed"
+    tracer.deactivate(task.request.trace_token)
+    tracer.end(span)
+
+
+@worker_ready.connect
+def _start_heartbeat(**kwargs):
+    worker_heartbeat.start()
+
+
+@worker_shutdown.connect
+def _stop_heartbeat(**kwargs):
+    worker_heartbeat.stop()
+
+
+@c_app.task(ignore_result=True)
+def send_email(recipients: list[str], template_id: str, context: dict):
+    with tracer.start_span("mail.render", attributes={"mail.template": template_id}):
+        subject, html_message = render_email(template_id, context)
     message = create_message(recipients=recipients, subject=subject, body=html_message)
-    async_to_sync(mail.send_message)(message)
\ No newline at end of file
+    with tracer.start_span("smtp.send", kind="client", attributes={"mail.recipients": len(recipients)}):
+        async_to_sync(get_mail().send_message)(message)
+
+
+@c_app.task(ignore_result=True)
+def send_bulk_email(recipients: list[str], template_id: str, context: dict):
+    """Fan a large recipient list out into send_email tasks of
+    MAIL_BULK_CHUNK_SIZE recipients each, all on the bulk queue"""
+    for recipient_chunk in chunked(recipients, Config.MAIL_BULK_CHUNK_SIZE):
+        send_email.apply_async(
+            kwargs={"recipients": recipient_chunk, "template_id": template_id, "context": context},
+            queue=MAIL_BULK_QUEUE,
+        )
+
+
+async def _archive_expired_items(cutoff: date) -> int:
+    async with task_session() as session:
+        return await archive_service.archive_expired(
+            cutoff, Config.ARCHIVE_BATCH_SIZE, Config.ARCHIVE_MAX_BATCHES, session
+        )
+
+@c_app.task(ignore_result=True)
+def archive_expired_items():
+    cutoff = date.today() - timedelta(days=Config.ARCHIVE_AFTER_DAYS)
+    return async_to_sync(_archive_expired_items)(cutoff)
+
+
+async def _purge_deleted_rows(deleted_before: datetime) -> dict:
+    purged = {"items": 0, "tags": 0}
+    async with task_session() as session:
+        for _ in range(Config.PURGE_MAX_BATCHES):
+            count = await item_service.purge_deleted_items(deleted_before, Config.PURGE_BATCH_SIZE, session)
+            purged["items"] += count
+            if count < Config.PURGE_BATCH_SIZE:
+                break
+        for _ in range(Config.PURGE_MAX_BATCHES):
+            count = await tag_service.purge_deleted_tags(deleted_before, Config.PURGE_BATCH_SIZE, session)
+            purged["tags"] += count
+            if count == 0:
+                break
+    return purged
+
+@c_app.task(ignore_result=True)
+def purge_deleted_rows():
+    deleted_before = datetime.now() - timedelta(hours=Config.PURGE_GRACE_HOURS)
+    return async_to_sync(_purge_deleted_rows)(deleted_before)
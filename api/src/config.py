@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -17,16 +19,126 @@ class Settings(BaseSettings):
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
     DOMAIN: str
+    MAIL_BACKEND: Literal["celery", "inprocess"] = "celery"
+    MAIL_QUEUE_SIZE: int = 1000
+    MAIL_BATCH_SIZE: int = 50
+    MAIL_MAX_RETRIES: int = 5
+    MAIL_RETRY_BACKOFF: float = 1.0
+    MAIL_RETRY_BACKOFF_MAX: float = 60.0
+    MAIL_SMTP_IDLE_TIMEOUT: float = 30.0
+    MAIL_DRAIN_TIMEOUT: float = 10.0
+    MAIL_BULK_CHUNK_SIZE: int = 100
+    MAIL_TEMPLATE_CACHE_DIR: str = "/tmp/warehouse-mail-templates"
+    CELERY_CONCURRENCY: int = 0
+    CELERY_PREFETCH_MULTIPLIER: int = 1
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 8000
+    WEB_WORKERS: int = 0
+    WEB_KEEPALIVE: int = 75
+    WEB_BACKLOG: int = 2048
+    WEB_GRACEFUL_TIMEOUT: int = 30
+    WEB_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    ADMISSION_LIMITS: dict[str, int] = {
+        "items_list": 8,
+        "notes_list": 8,
+        "tags_list": 8,
+        "login": 4,
+    }
+    ADMISSION_QUEUE_TIMEOUTS: dict[str, float] = {
+        "items_list": 0.5,
+        "notes_list": 0.5,
+        "tags_list": 0.5,
+        "login": 1.0,
+    }
+    ADMISSION_DEFAULT_LIMIT: int = 16
+    ADMISSION_DEFAULT_QUEUE_TIMEOUT: float = 0.5
+    ADMISSION_RETRY_AFTER: int = 1
+    SINGLEFLIGHT_TIMEOUTS: dict[str, float] = {
+        "item": 2.0,
+        "tags": 2.0,
+        "user_by_email": 1.0,
+    }
+    SINGLEFLIGHT_DEFAULT_TIMEOUT: float = 2.0
+    STATEMENT_TIMEOUTS: dict[str, int] = {
+        "items_list": 3000,
+        "notes_list": 3000,
+        "tags_list": 2000,
+        "item_detail": 1000,
+        "login": 1000,
+    }
+    STATEMENT_TIMEOUT_DEFAULT: int = 10000
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_USER_RATE: float = 10.0
+    RATE_LIMIT_USER_BURST: int = 30
+    RATE_LIMIT_IP_RATE: float = 1.0
+    RATE_LIMIT_IP_BURST: int = 10
+    ITEM_DETAIL_NOTES: int = 10
+    EVENTS_CHANNEL: str = "warehouse_events"
+    EVENTS_QUEUE_SIZE: int = 256
+    EVENTS_HEARTBEAT: float = 15.0
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 5
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    TRACING_EXPORTER: Literal["none", "jsonl", "otlp"] = "none"
+    TRACING_SAMPLE_RATE: float = 1.0
+    TRACING_SERVICE_NAME: str = "warehouse-api"
+    TRACING_FILE: str = "logs/traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    HEALTH_CHECK_INTERVAL: float = 5.0
+    HEALTH_CHECK_TIMEOUT: float = 2.0
+    HEALTH_STALE_AFTER: float = 30.0
+    WORKER_HEARTBEAT_KEY: str = "celery:heartbeat"
+    WORKER_HEARTBEAT_INTERVAL: float = 10.0
+    WORKER_HEARTBEAT_TTL: int = 30
+    ARCHIVE_AFTER_DAYS: int = 0
+    ARCHIVE_BATCH_SIZE: int = 1000
+    ARCHIVE_MAX_BATCHES: int = 500
+    ARCHIVE_HOUR: int = 2
+    PURGE_GRACE_HOURS: int = 24
+    PURGE_BATCH_SIZE: int = 500
+    PURGE_MAX_BATCHES: int = 1000
+    PURGE_HOUR: int = 3
     model_config = SettingsConfigDict(
         env_file=".env",
         extra="ignore"
     )
 
-Config = Settings()
 
+class LazySettings:
+    """Builds Settings on first attribute access instead of at import, so
+    importing a module that reads settings only inside functions stays cheap"""
+
+    def __init__(self) -> None:
+        self._settings: Settings | None = None
+
+    def __getattr__(self, name: str):
+        if self._settings is None:
+            self._settings = Settings()
+        return getattr(self._settings, name)
+
+
+Config = LazySettings()
+
+
+class SettingDefault:
+    """Instance attribute that falls back to a setting when left as None. The
+    setting is read on use, so module-level instances don't build Settings
+    at import."""
+
+    def __init__(self, setting: str) -> None:
+        self.setting = setting
 
-broker_url = Config.REDIS_URL
+    def __set_name__(self, owner, name: str) -> None:
+        self.attribute = f"_{name}"
 
-result_backend = Config.REDIS_URL
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__.get(self.attribute)
+        return getattr(Config, self.setting) if value is None else value
 
-broker_connection_retry_on_startup = True
\ No newline at end of file
+    def __set__(self, instance, value) -> None:
+        instance.__dict__[self.attribute] = value
@@ -1,27 +1,149 @@
 from sqlmodel import create_engine, SQLModel
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker, Session, with_loader_criteria
+from sqlalchemy.pool import NullPool
+from contextlib import asynccontextmanager
 
 from src.config import Config
+from src.db.models import Items, Tag
+from src.errors import QueryTimeout
+from src.metrics import QUERY_TIMEOUTS
+from src.tracing import tracer
+from src.logging import logger
 
 
-engine = AsyncEngine(
-    create_engine(
-    url= Config.DATABASE_URL,
-    echo=True
-))
+QUERY_CANCELED = "57014"
+
+
+_engine: AsyncEngine | None = None
+
+async_session = sessionmaker(class_=AsyncSession, expire_on_commit=False)
+
+
+def get_engine() -> AsyncEngine:
+    """The worker's pooled engine. The app lifespan opens it after the server
+    has forked, so no pool is ever shared between processes; code running
+    outside the app (scripts, benchmarks) gets it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = AsyncEngine(
+            create_engine(
+            url=Config.DATABASE_URL,
+            echo=Config.DB_ECHO,
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_MAX_OVERFLOW,
+        ))
+    return _engine
+
+
+async def close_engine():
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_soft_deleted(execute_state):
+    """Hide soft deleted items and tags from every ORM query, relationship
+    loads included. Pass execution option include_deleted=True to see them."""
+    if (
+        (execute_state.is_select or execute_state.is_update or execute_state.is_delete)
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Items, Items.deleted_at.is_(None), include_aliases=True),
+            with_loader_criteria(Tag, Tag.deleted_at.is_(None), include_aliases=True),
+        )
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    """SET LOCAL the session's statement_timeout budget at the start of every
+    transaction, so it survives commits and never leaks into the pool"""
+    timeout = session.info.get("statement_timeout")
+    if timeout:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_sql_span(conn, cursor, statement, parameters, context, executemany):
+    """A span per statement, under the span of the request or task running it.
+    Parameters are left out, they can carry personal data."""
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._trace_span = tracer.child(
+        f"SQL {verb}", kind="client", attributes={"db.system": "postgresql", "db.statement": statement[:1000]}
+    )
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_sql_span(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        tracer.end(span)
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_sql_span(exception_context):
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None:
+        span.record_error(exception_context.original_exception)
+        tracer.end(span)
+
+
+def is_query_timeout(error: Exception) -> bool:
+    return isinstance(error, DBAPIError) and getattr(error.orig, "sqlstate", None) == QUERY_CANCELED
+
 
 async def init_db():
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 async def get_session() -> AsyncSession:
-    Session = sessionmaker(
-        bind=engine,
-        class_=AsyncSession,
-        expire_on_commit=False
+    async with async_session(bind=get_engine()) as session:
+        session.info["statement_timeout"] = Config.STATEMENT_TIMEOUT_DEFAULT
+        session.info["statement_timeout_budget"] = "default"
+        try:
+            yield session
+        except DBAPIError as e:
+            if not is_query_timeout(e):
+                raise
+            budget = session.info["statement_timeout_budget"]
+            logger.error(f"Query timeout: {budget} budget of {session.info['statement_timeout']}ms exceeded")
+            QUERY_TIMEOUTS.labels(budget).inc()
+            raise QueryTimeout() from e
+
+
+def side_session(session: AsyncSession) -> AsyncSession:
+    """Short-lived session beside `session`, on the same engine and under the
+    same statement timeout but with a pool connection of its own. Whatever
+    it loads is detached, and nobody else's to modify, once it closes."""
+    side = async_session(bind=session.bind)
+    side.info.update(
+        statement_timeout=session.info.get("statement_timeout"),
+        statement_timeout_budget=session.info.get("statement_timeout_budget"),
     )
-    async with Session() as session:
-        yield session
+    return side
+
+
+@asynccontextmanager
+async def task_session():
+    """Session for Celery tasks. Each task runs on its own event loop, so it
+    gets a private unpooled engine instead of sharing the API pool."""
+    task_engine = AsyncEngine(
+        create_engine(
+        url=Config.DATABASE_URL,
+        poolclass=NullPool
+    ))
+    try:
+        async with AsyncSession(task_engine, expire_on_commit=False) as session:
+            yield session
+    finally:
+        await task_engine.dispose()
 
@@ -1,19 +1,23 @@
 from sqlmodel import SQLModel, Field, Column, Relationship
+from sqlalchemy import Index, func, text
 from typing import Optional, List
 import uuid
 from datetime import datetime, date
 import sqlalchemy.dialects.postgresql as pg
 
+from src.db.uuid7 import uuid7
+
 
 # ================ USER PART =================================
 class User(SQLModel, table=True):
     __tablename__ = 'users'
+    __table_args__ = (Index("ix_users_email", "email"),)
     uid: uuid.UUID = Field(
         sa_column=Column(
             pg.UUID,
             nullable=False,
             primary_key=True,
-            default=uuid.uuid4
+            default=uuid7
         )
     )
     username: str
@@ -43,8 +47,9 @@ class User(SQLModel, table=True):
             default=datetime.now
         )
     )
-    items: List["Items"]  = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
-    notes: List["Notes"]  = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
+    # every authenticated request loads the user, never drag its items and notes along
+    items: List["Items"]  = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "noload"})
+    notes: List["Notes"]  = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "noload"})
     
     def __repr__(self):
         return f"<User {self.username}>"
@@ -52,21 +57,33 @@ class User(SQLModel, table=True):
 
  #  ========================== TAGS PART ==================================
 class ItemTag(SQLModel, table=True):
+    __table_args__ = (Index("ix_itemtag_tag_id_item_created_at_item_id", "tag_id", "item_created_at", "item_id"),)
     item_id: uuid.UUID = Field(default=None, foreign_key="items.uid", primary_key=True)
     tag_id: uuid.UUID = Field(default=None, foreign_key="tags.uid", primary_key=True)
+    # copy of the item's created_at, so a tag's items page newest first off
+    # this table alone; write links with it set rather than through Items.tags
+    item_created_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
 
 
 class Tag(SQLModel, table=True):
     __tablename__ = "tags"
+    __table_args__ = (
+        Index("ix_tags_live_name", "name", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_tags_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
     uid: uuid.UUID = Field(
-        sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
+        sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid7)
     )
     name: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    version: int = Field(default=1, sa_column=Column(pg.INTEGER, nullable=False, default=1, server_default="1"))
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    deleted_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
+    # never loaded, a popular tag carries tens of thousands of items; page
+    # through them with TagService.get_tag_items instead
     items: List["Items"] = Relationship(
         link_model=ItemTag,
         back_populates="tags",
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "noload"},
     )
 
     def __repr__(self) -> str:
@@ -76,12 +93,19 @@ class Tag(SQLModel, table=True):
 
 class Items(SQLModel, table=True):
     __tablename__ = "items"
+    __table_args__ = (
+        Index("ix_items_user_uid_created_at_uid", "user_uid", "created_at", "uid"),
+        Index("ix_items_live_owner", "owner", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_items_live_stored_exp_date", "stored_exp_date", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_items_live_created_at_uid", "created_at", "uid", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_items_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
     uid: uuid.UUID = Field(
         sa_column=Column(
             pg.UUID,
             nullable=False,
             primary_key=True,
-            default=uuid.uuid4
+            default=uuid7
         )
     )
     title: str
@@ -89,18 +113,21 @@ class Items(SQLModel, table=True):
     stored_exp_date: date
     ph_number: str
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid") 
+    version: int = Field(default=1, sa_column=Column(pg.INTEGER, nullable=False, default=1, server_default="1"))
     created_at: datetime = Field(
         sa_column=Column(
             pg.TIMESTAMP,
-            default=datetime.now()
+            default=datetime.now
     ))
     updated_at: datetime = Field(
         sa_column=Column(
             pg.TIMESTAMP,
-            default=datetime.now()
+            default=datetime.now
     ))
+    deleted_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
     user: Optional[User]  = Relationship(back_populates="items")
-    notes: List["Notes"]  = Relationship(back_populates="item", sa_relationship_kwargs={"lazy": "selectin"})
+    # items collect thousands of notes, page through them with NotesService.get_item_notes
+    notes: List["Notes"]  = Relationship(back_populates="item", sa_relationship_kwargs={"lazy": "noload"})
     tags: List[Tag] = Relationship(
         link_model=ItemTag,
         back_populates="items",
@@ -116,12 +143,17 @@ class Items(SQLModel, table=True):
 
 class Notes(SQLModel, table=True):
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("ix_notes_item_uid_created_at_uid", "item_uid", "created_at", "uid"),
+        Index("ix_notes_created_at_uid", "created_at", "uid"),
+        Index("ix_notes_user_uid_created_at_uid", "user_uid", "created_at", "uid"),
+    )
     uid: uuid.UUID = Field(
         sa_column=Column(
             pg.UUID,
             nullable=False,
             primary_key=True,
-            default=uuid.uuid4
+            default=uuid7
         )
     )
     note_text: str
@@ -130,12 +162,12 @@ class Notes(SQLModel, table=True):
     created_at: datetime = Field(
         sa_column=Column(
             pg.TIMESTAMP,
-            default=datetime.now()
+            default=datetime.now
     ))
     updated_at: datetime = Field(
         sa_column=Column(
             pg.TIMESTAMP,
-            default=datetime.now()
+            default=datetime.now
     ))
     user: Optional[User]  = Relationship(back_populates="notes")
     item: Optional[Items]  = Relationship(back_populates="notes")
@@ -143,7 +175,50 @@ class Notes(SQLModel, table=True):
     
     def __repr__(self):
         return f"<Notes for {self.item_uid} by user {self.user_uid}>"
-    
 
 
-   
\ No newline at end of file
+# =========================== STATS PART =============================
+
+class StatCounter(SQLModel, table=True):
+    """Aggregate counters kept up to date by the write paths.
+
+    kind is one of user_items, user_notes, item_notes, tag_items, expiring_week and key
+    is the counted entity uid (or the week start date for expiring_week).
+    """
+    __tablename__ = "stat_counters"
+    __table_args__ = (Index("ix_stat_counters_kind_value", "kind", "value"),)
+    kind: str = Field(sa_column=Column(pg.VARCHAR, primary_key=True))
+    key: str = Field(sa_column=Column(pg.VARCHAR, primary_key=True))
+    value: int = Field(sa_column=Column(pg.BIGINT, nullable=False, server_default="0"))
+
+    def __repr__(self):
+        return f"<StatCounter {self.kind}:{self.key}={self.value}>"
+
+
+# =========================== ARCHIVE PART =============================
+
+class ItemArchive(SQLModel, table=True):
+    """Expired items moved out of the hot `items` table, with their notes and
+    tags folded into JSONB. Range partitioned by month of stored_exp_date,
+    the archival job creates the monthly partitions it needs.
+    """
+    __tablename__ = "items_archive"
+    __table_args__ = (
+        Index("ix_items_archive_user_uid", "user_uid"),
+        {"postgresql_partition_by": "RANGE (stored_exp_date)"},
+    )
+    uid: uuid.UUID = Field(sa_column=Column(pg.UUID, primary_key=True))
+    title: str
+    owner: str
+    stored_exp_date: date = Field(sa_column=Column(pg.DATE, primary_key=True))
+    ph_number: str
+    user_uid: Optional[uuid.UUID] = Field(default=None, sa_column=Column(pg.UUID))
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP))
+    updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP))
+    archived_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, server_default=func.now()))
+    notes: List[dict] = Field(default_factory=list, sa_column=Column(pg.JSONB, nullable=False, server_default="[]"))
+    tags: List[dict] = Field(default_factory=list, sa_column=Column(pg.JSONB, nullable=False, server_default="[]"))
+
+    def __repr__(self):
+        return f"<ItemArchive: {self.title}>"
+
@@ -1,18 +1,90 @@
 import redis.asyncio as aioredis
 
 from src.config import Config
+from src.tracing import tracer
 
 JTI_EXPIRY = 3600
 
+# Token bucket kept in a hash {tokens, ts}. Runs atomically inside Redis so
+# every worker shares one bucket per key. Uses the Redis clock so workers
+# with skewed clocks still agree on the refill.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+else
+    retry_after = (requested - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class TracedRedis(aioredis.Redis):
+    """Redis client with a span per command, scripts included"""
+
+    async def execute_command(self, *args, **options):
+        span = tracer.child(f"redis {args[0]}", kind="client", attributes={"db.system": "redis"})
+        if span is None:
+            return await super().execute_command(*args, **options)
+        try:
+            return await super().execute_command(*args, **options)
+        except Exception as e:
+            span.record_error(e)
+            raise
+        finally:
+            tracer.end(span)
+
+
+_client: TracedRedis | None = None
+_token_bucket = None
+
+
+def get_redis() -> TracedRedis:
+    """The worker's Redis client, opened by the app lifespan after fork or
+    on first use outside the app"""
+    global _client, _token_bucket
+    if _client is None:
+        _client = TracedRedis.from_url(Config.REDIS_URL)
+        _token_bucket = _client.register_script(TOKEN_BUCKET_SCRIPT)
+    return _client
+
+
+async def close_redis():
+    global _client, _token_bucket
+    if _client is not None:
+        await _client.aclose()
+        _client = _token_bucket = None
+
 
-token_blocklist = aioredis.from_url(Config.REDIS_URL)
 async def add_jti_to_blocklist(jti:str) -> None:
-    await token_blocklist.set(
+    await get_redis().set(
         name=jti,
         value="",
         ex=JTI_EXPIRY
     
     )
 async def token_in_blocklist(jti:str) -> bool:
-    jti = await token_blocklist.get(jti)
+    jti = await get_redis().get(jti)
     return jti is not None
+
+async def take_rate_limit_token(key: str, rate: float, burst: int) -> tuple[bool, float]:
+    """Take one token from the bucket at `key`, returns (allowed, retry_after seconds)"""
+    get_redis()
+    allowed, retry_after = await _token_bucket(keys=[key], args=[rate, burst, 1])
+    return bool(allowed), float(retry_after)
@@ -0,0 +1,41 @@
+import secrets
+import threading
+import time
+import uuid
+
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID (RFC 9562 version 7).
+
+    48 bits of unix milliseconds followed by a 12 bit counter and 62 random
+    bits. The counter keeps keys generated in the same millisecond by this
+    process increasing, so new rows always land at the right edge of the
+    primary key btree.
+    """
+    global _last_ms, _counter
+
+    now_ms = time.time_ns() // 1_000_000
+    with _lock:
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # start low in the range so the counter has room to grow
+            _counter = secrets.randbits(9)
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= counter << 64
+    value |= 0b10 << 62
+    value |= secrets.randbits(62)
+    return uuid.UUID(int=value)
+
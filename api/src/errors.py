@@ -56,6 +56,30 @@ class AccountNotVerified (WarehouseException):
     """Account is not yet vierified"""
     pass
 
+class VersionConflict(WarehouseException):
+    """Resource was changed by someone else since the version the client sent"""
+    pass
+
+class InvalidCursor(WarehouseException):
+    """User has provided a pagination cursor that was not issued by the API"""
+    pass
+
+class QueryTimeout(WarehouseException):
+    """A database query ran past the statement timeout of its route"""
+    pass
+
+class ServiceOverloaded(WarehouseException):
+    """Request could not be admitted before its queue-time budget ran out"""
+    def __init__(self, retry_after: int = 1):
+        super().__init__()
+        self.retry_after = retry_after
+
+class RateLimitExceeded(WarehouseException):
+    """User or client has used up its request budget"""
+    def __init__(self, retry_after: int = 1):
+        super().__init__()
+        self.retry_after = retry_after
+
 
 def create_exception_handler(
     status_code: int,
@@ -63,7 +87,11 @@ def create_exception_handler(
 ) -> Callable[[Request,Exception], JSONResponse]:
     async def exception_handler(request: Request, exc: WarehouseException):
 
-        return JSONResponse(content=initial_detail, status_code=status_code)
+        headers = None
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            headers = {"Retry-After": str(retry_after)}
+        return JSONResponse(content=initial_detail, status_code=status_code, headers=headers)
 
     return exception_handler
 
@@ -195,6 +223,65 @@ def register_error_handlers(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        VersionConflict,
+        create_exception_handler(
+            status_code=status.HTTP_409_CONFLICT,
+            initial_detail={
+                "message": "Resource was modified by another request",
+                "error_code": "version_conflict",
+                "resolution": "Please fetch the latest version and retry",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid pagination cursor",
+                "error_code": "invalid_cursor",
+                "resolution": "Please use the next_cursor of the previous page",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        QueryTimeout,
+        create_exception_handler(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            initial_detail={
+                "message": "Request took too long to complete",
+                "error_code": "query_timeout",
+                "resolution": "Please narrow down the request and retry",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        ServiceOverloaded,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Server is busy, please retry later",
+                "error_code": "service_overloaded",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        RateLimitExceeded,
+        create_exception_handler(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            initial_detail={
+                "message": "Too many requests",
+                "error_code": "rate_limit_exceeded",
+                "resolution": "Please slow down and retry later",
+            },
+        ),
+    )
+
     @app.exception_handler(500)
     async def internal_server_error(request, exc):
 
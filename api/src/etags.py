@@ -0,0 +1,22 @@
+from src.errors import VersionConflict
+
+
+def format_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(if_match: str | None) -> int | None:
+    """Version the client expects from an `If-Match` header, None when the
+    header is absent or `*` (update whatever is there)"""
+    if if_match is None:
+        return None
+    value = if_match.strip()
+    if value == "*":
+        return None
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        # can never match any stored version
+        raise VersionConflict()
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import asyncpg
+
+from src.config import Config, SettingDefault
+from src.logging import logger
+
+
+def asyncpg_dsn(url: str) -> str:
+    """asyncpg does not understand the SQLAlchemy `+driver` suffix."""
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+class ChangeFeed:
+    """Fans change notifications out to the subscribers of this worker.
+
+    The worker holds a single LISTEN connection, opened with the first
+    subscriber and reopened if it drops. Every subscriber gets a bounded
+    queue; one that falls `EVENTS_QUEUE_SIZE` events behind is cut off
+    (it receives None) instead of making the worker buffer without limit.
+    """
+
+    channel = SettingDefault("EVENTS_CHANNEL")
+    queue_size = SettingDefault("EVENTS_QUEUE_SIZE")
+
+    def __init__(self, channel: str | None = None, queue_size: int | None = None, reconnect_delay: float = 1.0):
+        self.channel = channel
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self.subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        return queue
+
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+
+    def _dispatch(self, connection, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.error(f"Change feed: dropping malformed event {payload!r}")
+            return
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.error("Change feed: subscriber is too slow, disconnecting it")
+                self.subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+
+    async def _listen(self):
+        while True:
+            try:
+                connection = await asyncpg.connect(asyncpg_dsn(Config.DATABASE_URL))
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.error(f"Change feed: cannot connect, retrying: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            try:
+                await connection.add_listener(self.channel, self._dispatch)
+                logger.info(f"Change feed: listening on {self.channel}")
+                await lost.wait()
+                logger.error("Change feed: connection lost, reconnecting")
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queue in list(self.subscribers):
+            self.unsubscribe(queue)
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,103 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from src.userauth.dependencies import AccessTokenBearer, RoleChecker
+from src.userauth.services import UserService
+from src.userauth.utils import decode_token
+from src.db.main import async_session, get_engine
+from src.db.redis import token_in_blocklist
+from src.config import Config
+from .feed import change_feed
+from src.logging import logger
+
+
+# "/events"
+events_router = APIRouter()
+access_token_bearer = AccessTokenBearer()
+user_service = UserService()
+allowed_roles = ["user", "admin"]
+user_role_checker = Depends(RoleChecker(allowed_roles))
+
+
+def wanted(event: dict, prefix: Optional[str]) -> bool:
+    return prefix is None or event["event"].startswith(prefix)
+
+
+@events_router.get("/stream", dependencies=[user_role_checker])
+async def stream_events(
+    kind: Optional[str] = Query(default=None, description="only events starting with this, e.g. item or note"),
+    _: dict = Depends(access_token_bearer),
+):
+
+    logger.info("Streaming change events: processing request..")
+    queue = change_feed.subscribe()
+
+    async def event_stream():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), Config.EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # comment line, keeps proxies from closing an idle stream
+                    yield ": ping\n\n"
+                    continue
+                if event is None:
+                    return
+                if wanted(event, kind):
+                    yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            change_feed.unsubscribe(queue)
+            logger.info("Streaming change events: subscriber left")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@events_router.websocket("/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    token: str = Query(description="access token, browsers can't set headers on websockets"),
+    kind: Optional[str] = Query(default=None),
+):
+
+    logger.info("Streaming change events over websocket: processing request..")
+    token_data = decode_token(token)
+    if not token_data or token_data.get("refresh") or await token_in_blocklist(token_data["jti"]):
+        logger.error("Invalid Token")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    # the same checks as RoleChecker, in a session of its own, the handler outlives any request session
+    async with async_session(bind=get_engine()) as session:
+        user = await user_service.get_user_by_email(token_data["user"]["email"], session)
+    if not user or not user.is_verified or user.role not in allowed_roles:
+        logger.error("Websocket events: user not allowed")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    queue = change_feed.subscribe()
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), Config.EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"event": "ping"})
+                continue
+            if event is None:
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            if wanted(event, kind):
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        change_feed.unsubscribe(queue)
+        logger.info("Streaming change events over websocket: subscriber left")
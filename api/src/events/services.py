@@ -0,0 +1,34 @@
+import json
+from datetime import datetime
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+
+
+ITEM_CREATED = "item.created"
+ITEM_UPDATED = "item.updated"
+ITEM_DELETED = "item.deleted"
+ITEM_TAGGED = "item.tagged"
+TAG_UPDATED = "tag.updated"
+TAG_DELETED = "tag.deleted"
+NOTE_CREATED = "note.created"
+NOTE_DELETED = "note.deleted"
+
+
+class EventService:
+    """Publishes change events with pg_notify.
+
+    Like the counter bumps, publish doesn't commit: the notification is sent
+    by Postgres only when the caller's transaction commits, so subscribers
+    never hear about changes that were rolled back. Keep payloads to ids and
+    versions, NOTIFY payloads are capped at 8000 bytes.
+    """
+
+    async def publish(self, event: str, data: dict, session: AsyncSession):
+
+        payload = json.dumps({"event": event, "at": datetime.now().isoformat(), **data}, default=str)
+        await session.exec(
+            text("SELECT pg_notify(:channel, :payload)"),
+            params={"channel": Config.EVENTS_CHANNEL, "payload": payload},
+        )
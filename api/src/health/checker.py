@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from src.config import SettingDefault
+from src.db.main import get_engine
+from src.db.redis import get_redis
+from src.logging import logger
+
+
+class HealthChecker:
+    """Checks the worker's dependencies in the background and caches the results.
+
+    Every `interval` seconds the database (one pooled connection running
+    SELECT 1) and Redis (PING) are checked, each bounded by `timeout`.
+    Readiness probes only read the cached results, so however often they
+    are called the dependencies see one check per worker per interval.
+    Results older than `stale_after` count as failed, which covers a stuck
+    checker.
+    """
+
+    interval = SettingDefault("HEALTH_CHECK_INTERVAL")
+    timeout = SettingDefault("HEALTH_CHECK_TIMEOUT")
+    stale_after = SettingDefault("HEALTH_STALE_AFTER")
+
+    def __init__(self, interval: float | None = None, timeout: float | None = None, stale_after: float | None = None):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.results: dict[str, dict] = {}
+        self._task: asyncio.Task | None = None
+
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+
+    async def _check_database(self) -> dict:
+        engine = get_engine()
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        pool = engine.pool
+        return {"pool_size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()}
+
+
+    async def _check_redis(self) -> dict:
+        await get_redis().ping()
+        return {}
+
+
+    async def _check(self, name: str, check) -> dict:
+        started = time.monotonic()
+        try:
+            details = await asyncio.wait_for(check(), self.timeout)
+            result = {"ok": True, **details}
+        except Exception as e:
+            logger.error(f"Health check: {name} failed: {e!r}")
+            result = {"ok": False, "error": repr(e)}
+        result["latency_ms"] = round((time.monotonic() - started) * 1000, 2)
+        result["checked_at"] = time.time()
+        return result
+
+
+    async def check_all(self):
+        database, redis = await asyncio.gather(
+            self._check("database", self._check_database),
+            self._check("redis", self._check_redis),
+        )
+        self.results = {"database": database, "redis": redis}
+
+
+    async def _run(self):
+        while True:
+            await self.check_all()
+            await asyncio.sleep(self.interval)
+
+
+    def ready(self) -> tuple[bool, dict]:
+        """(ready, cached results), never does any I/O"""
+        now = time.time()
+        checks = {}
+        for name, result in self.results.items():
+            stale = now - result["checked_at"] > self.stale_after
+            checks[name] = {**result, "ok": result["ok"] and not stale, "stale": stale}
+        return bool(checks) and all(check["ok"] for check in checks.values()), checks
+
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+health_checker = HealthChecker()
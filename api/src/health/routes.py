@@ -0,0 +1,24 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from .checker import health_checker
+
+
+# mounted at the root, "/healthz" and "/readyz"
+health_router = APIRouter()
+
+
+@health_router.get("/healthz", include_in_schema=False)
+async def liveness():
+    """The worker's event loop is serving requests, no I/O"""
+    return {"status": "ok"}
+
+
+@health_router.get("/readyz", include_in_schema=False)
+async def readiness():
+    """Database and Redis reachable, from the background checker's cache"""
+    ready, checks = health_checker.ready()
+    return JSONResponse(
+        content={"status": "ready" if ready else "unavailable", "checks": checks},
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
@@ -0,0 +1,56 @@
+import socket
+import threading
+import time
+
+import redis
+
+from src.config import Config
+from src.logging import logger
+
+
+def heartbeat_key(hostname: str | None = None) -> str:
+    return f"{Config.WORKER_HEARTBEAT_KEY}:{hostname or socket.gethostname()}"
+
+
+class WorkerHeartbeat:
+    """Keeps a `<WORKER_HEARTBEAT_KEY>:<hostname>` key alive in Redis while
+    the Celery worker runs.
+
+    A daemon thread in the main worker process refreshes the key every
+    `interval` seconds with a `ttl` expiry, so the key disappears on its own
+    when the worker dies or hangs. A healthcheck only has to test whether the
+    key exists instead of starting an interpreter for `celery inspect ping`.
+    """
+
+    def __init__(self, interval: float, ttl: int):
+        self.interval = interval
+        self.ttl = ttl
+        self.key = heartbeat_key()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="worker-heartbeat", daemon=True)
+        self._thread.start()
+
+
+    def _run(self):
+        client = redis.Redis.from_url(Config.REDIS_URL, socket_timeout=self.interval)
+        while not self._stop.is_set():
+            try:
+                client.set(self.key, int(time.time()), ex=self.ttl)
+            except redis.RedisError as e:
+                logger.error(f"Worker heartbeat: cannot reach Redis: {e}")
+            self._stop.wait(self.interval)
+        try:
+            client.delete(self.key)
+        except redis.RedisError:
+            pass
+        client.close()
+
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
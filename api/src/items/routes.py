@@ -1,12 +1,18 @@
-from fastapi import APIRouter, status, Depends
-from typing import List
+from fastapi import APIRouter, status, Depends, Header, Query, Response
+import uuid
+from typing import Annotated, List, Optional
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from .schemas import Items, ItemDetails,ItemUpdate,CreateItems
+from .schemas import Items, ItemDetails,ItemUpdate,CreateItems, ItemFilters, ItemsSparse, ItemLookup, ItemLookupResult
 from ..db.main import get_session
 from .services import ItemsService
+from src.notes.schemas import NotePage
+from src.notes.services import NotesService
+from src.config import Config
 from src.userauth.dependencies import AccessTokenBearer
 from src.userauth.dependencies import RoleChecker
+from src.admission import AdmissionControl, RateLimiter, StatementTimeout
+from src.etags import format_etag, parse_if_match
 from src.errors import (
     ItemNotFound
 )
@@ -16,28 +22,47 @@ from src.logging import logger
 item_router = APIRouter()
 
 item_service = ItemsService()
+notes_service = NotesService()
 
 admin_role_checker= Depends(RoleChecker(['admin']))
 user_role_checker= Depends(RoleChecker(['admin','user']))
 
 access_token_bearer = AccessTokenBearer()
 
+items_list_admission = Depends(AdmissionControl("items_list"))
+items_list_rate_limit = Depends(RateLimiter("items_list", scope="user"))
+items_list_timeout = Depends(StatementTimeout("items_list"))
+item_detail_timeout = Depends(StatementTimeout("item_detail"))
 
-@item_router.get("/",response_model=List[Items], dependencies= [user_role_checker])
-async def get_all_items(session:AsyncSession = Depends(get_session), _: dict=Depends(access_token_bearer)):
+
+@item_router.get("/",response_model=List[ItemsSparse], response_model_exclude_unset=True, dependencies= [items_list_timeout, items_list_rate_limit, items_list_admission, user_role_checker])
+async def get_all_items(
+    filters: Annotated[ItemFilters, Query()],
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    before: Optional[uuid.UUID] = Query(default=None, description="uid of the last item of the previous page"),
+    session:AsyncSession = Depends(get_session),
+    _: dict=Depends(access_token_bearer),
+):
 
     logger.info("Getting all items: processing request..")
-    items = await item_service.get_all_items(session)
+    items = await item_service.get_all_items(session, limit=limit, before=before, filters=filters)
     logger.info("Getting all items: returning result..")
     
     return items
 
 
-@item_router.get("/user/{user_uid}",response_model=List[Items], dependencies= [user_role_checker])
-async def get_user_item_submission(user_uid :str, session:AsyncSession = Depends(get_session), _: dict=Depends(access_token_bearer)):
+@item_router.get("/user/{user_uid}",response_model=List[ItemsSparse], response_model_exclude_unset=True, dependencies= [items_list_timeout, items_list_rate_limit, items_list_admission, user_role_checker])
+async def get_user_item_submission(
+    user_uid :str,
+    filters: Annotated[ItemFilters, Query()],
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    before: Optional[uuid.UUID] = Query(default=None, description="uid of the last item of the previous page"),
+    session:AsyncSession = Depends(get_session),
+    _: dict=Depends(access_token_bearer),
+):
     
     logger.info("Getting user item submission: processing request..")
-    items = await item_service.get_user_items(user_uid,session)
+    items = await item_service.get_user_items(user_uid,session, limit=limit, before=before, filters=filters)
     logger.info("Getting user item submission: returning result..")
     
     return items
@@ -55,27 +80,57 @@ async def create_item(item_data:CreateItems , session:AsyncSession = Depends(get
     return new_item
 
 
-@item_router.get("/{item_uid}", response_model=ItemDetails, status_code=status.HTTP_200_OK, dependencies= [user_role_checker])
-async def get_item(item_uid: str, session:AsyncSession = Depends(get_session), _: dict=Depends(access_token_bearer) ):
+@item_router.post("/lookup", response_model=ItemLookupResult, dependencies= [items_list_timeout, items_list_rate_limit, items_list_admission, user_role_checker])
+async def lookup_items(lookup: ItemLookup, session:AsyncSession = Depends(get_session), _: dict=Depends(access_token_bearer) ):
+
+    logger.info(f"Looking up {len(lookup.uids)} items: processing request..")
+    result = await item_service.get_items_details(lookup.uids, session, notes_limit=Config.ITEM_DETAIL_NOTES)
+    if result["missing"]:
+        logger.error(f"Looking up items: {len(result['missing'])} items not found")
+    logger.info("Looking up items: returning result..")
+
+    return result
+
+
+@item_router.get("/{item_uid}", response_model=ItemDetails, status_code=status.HTTP_200_OK, dependencies= [item_detail_timeout, user_role_checker])
+async def get_item(item_uid: str, response: Response, session:AsyncSession = Depends(get_session), _: dict=Depends(access_token_bearer) ):
     
     logger.info("Getting item: processing request..")
-    item = await item_service.get_item(item_uid, session)
+    item = await item_service.get_item_details(item_uid, session, notes_limit=Config.ITEM_DETAIL_NOTES)
     if item:
         logger.info("Getting user item submission: returning result..")
+        response.headers["ETag"] = format_etag(item["version"])
         return item
     logger.error("Getting item: item not found")
     raise ItemNotFound()
 
 
+@item_router.get("/{item_uid}/notes", response_model=NotePage, dependencies= [items_list_timeout, items_list_rate_limit, items_list_admission, user_role_checker])
+async def get_item_notes(
+    item_uid: str,
+    limit: int = Query(default=50, ge=1, le=1000),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+    session:AsyncSession = Depends(get_session),
+    _: dict=Depends(access_token_bearer),
+):
+
+    logger.info("Getting item notes: processing request..")
+    notes = await notes_service.get_item_notes(item_uid, session, limit=limit, cursor=cursor)
+    logger.info("Getting item notes: returning result..")
+
+    return notes
+
+
 @item_router.patch("/{item_uid}", response_model=Items, status_code=status.HTTP_200_OK, dependencies= [user_role_checker])
-async def update_item(item_uid: str, item_latest: ItemUpdate, session:AsyncSession = Depends(get_session), _: dict=Depends(access_token_bearer) ):
+async def update_item(item_uid: str, item_latest: ItemUpdate, response: Response, if_match: Optional[str] = Header(default=None), session:AsyncSession = Depends(get_session), _: dict=Depends(access_token_bearer) ):
     
 
     logger.info("Updating item: processing request..")
-    updated_item = await item_service.update_item(item_uid, item_latest, session)
+    updated_item = await item_service.update_item(item_uid, item_latest, session, expected_version=parse_if_match(if_match))
     
     if updated_item:
         logger.info("Updating item: returning result..")
+        response.headers["ETag"] = format_etag(updated_item["version"])
         return updated_item
     logger.error("Updating item: item not found")
     raise ItemNotFound()
@@ -1,7 +1,7 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 import uuid
 from datetime import datetime,date
-from typing import List
+from typing import List, Optional
 
 from src.notes.schemas import Notes
 from src.tags.schemas import TagModel
@@ -14,15 +14,72 @@ class Items(BaseModel):
     owner: str
     stored_exp_date: date
     ph_number: str
+    version: int
     created_at: datetime
     updated_at: datetime
 
+ITEM_FIELDS = tuple(Items.model_fields)
+
+
+class ItemsSparse(BaseModel):
+    """Item list entry holding only the columns asked for with `fields=`"""
+    uid: Optional[uuid.UUID] = None
+    title: Optional[str] = None
+    owner: Optional[str] = None
+    stored_exp_date: Optional[date] = None
+    ph_number: Optional[str] = None
+    version: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class ItemFilters(BaseModel):
+    owner: Optional[str] = None
+    exp_from: Optional[date] = None
+    exp_to: Optional[date] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    tag: List[str] = []
+    fields: Optional[List[str]] = None
+
+    @field_validator("fields", mode="before")
+    @classmethod
+    def split_fields(cls, value):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = [value]
+        names = [name.strip() for part in value for name in part.split(",") if name.strip()]
+        unknown = [name for name in names if name not in ITEM_FIELDS]
+        if unknown:
+            raise ValueError(f"unknown fields {unknown}, choose from {list(ITEM_FIELDS)}")
+        # uid is always returned, it is the pagination cursor
+        return ["uid"] + [name for name in dict.fromkeys(names) if name != "uid"]
+
+
+class ItemPage(BaseModel):
+    items: List[Items]
+    next_cursor: Optional[uuid.UUID] = None
+    count: Optional[int] = None
+
+
 class ItemDetails(Items):
     notes:List[Notes]
+    notes_count:int
     tags:List[TagModel]
 
 
 
+class ItemLookup(BaseModel):
+    uids: List[uuid.UUID] = Field(min_length=1, max_length=200)
+
+
+class ItemLookupResult(BaseModel):
+    items: List[ItemDetails]
+    missing: List[uuid.UUID]
+
+
+
 class ItemUpdate(BaseModel):
     title: str
     owner: str
@@ -1,32 +1,103 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select, desc
+from sqlalchemy import any_, cast, exists, func, literal, tuple_, update, text
 from datetime import datetime
+import sqlalchemy.dialects.postgresql as pg
 
-from .schemas import CreateItems, Items, ItemUpdate
-from src.db.models import Items
+from .schemas import CreateItems, Items, ItemUpdate, ItemFilters, ITEM_FIELDS
+from src.db.models import Items, ItemTag, Notes, Tag
+from src.stats.services import StatsService, USER_ITEMS, USER_NOTES, ITEM_NOTES, TAG_ITEMS, EXPIRING_WEEK, expiring_week_key
+from src.events.services import EventService, ITEM_CREATED, ITEM_UPDATED, ITEM_DELETED
+from src.singleflight import SingleFlight
+from src.errors import InvalidCursor, VersionConflict
+from src.tracing import traced
 from src.logging import logger
 
 
+stats_service = StatsService()
+event_service = EventService()
+item_flight = SingleFlight("item")
+
+
+# the newest notes of every item, one index range scan on
+# ix_notes_item_uid_created_at_uid per item instead of ranking all their notes
+RECENT_NOTES = text("""
+SELECT n.uid, n.note_text, n.user_uid, n.item_uid, n.created_at, n.updated_at
+FROM unnest(CAST(:item_uids AS uuid[])) AS i(uid)
+CROSS JOIN LATERAL (
+    SELECT * FROM notes
+    WHERE notes.item_uid = i.uid
+    ORDER BY created_at DESC, uid DESC
+    LIMIT :notes_limit
+) n
+""").columns(uid=pg.UUID, user_uid=pg.UUID, item_uid=pg.UUID, created_at=pg.TIMESTAMP, updated_at=pg.TIMESTAMP)
+
+
+async def item_position(item_uid, session:AsyncSession):
+    """(created_at, uid) of an item, for keyset pages continuing after it.
+    Read from the bare table, which the soft delete filter leaves alone, so a
+    page still continues after an item deleted since the previous one. A uid
+    that names no item, or one purged since, is not a cursor the API issued."""
+    cursor_item = Items.__table__.alias("cursor_item")
+    result = await session.exec(select(cursor_item.c.created_at).where(cursor_item.c.uid == item_uid))
+    created_at = result.first()
+    if created_at is None:
+        logger.error("Paging items: cursor item not found")
+        raise InvalidCursor()
+    return tuple_(literal(created_at, Items.created_at.type), literal(item_uid, Items.uid.type))
+
+
+@traced
 class ItemsService:
-    async def get_all_items(self, session:AsyncSession):
+    async def _list_query(self, filters:ItemFilters | None, limit:int | None, before:str | None, session:AsyncSession):
+        """Item listing narrowed by `filters` and projected to the requested
+        columns, newest first. Only plain columns are selected, so notes and
+        tags are never loaded for a listing."""
+
+        filters = filters or ItemFilters()
+        query = select(*[getattr(Items, name) for name in filters.fields or ITEM_FIELDS])
+        if filters.owner is not None:
+            query = query.where(Items.owner == filters.owner)
+        if filters.exp_from is not None:
+            query = query.where(Items.stored_exp_date >= filters.exp_from)
+        if filters.exp_to is not None:
+            query = query.where(Items.stored_exp_date < filters.exp_to)
+        if filters.created_from is not None:
+            query = query.where(Items.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            query = query.where(Items.created_at < filters.created_to)
+        if filters.tag:
+            # any of the given tags
+            query = query.where(
+                exists().where(ItemTag.item_id == Items.uid, ItemTag.tag_id == Tag.uid, Tag.name.in_(filters.tag))
+            )
+        # uids from before uuid7 carry no time, the uid only breaks created_at ties
+        query = query.order_by(desc(Items.created_at), desc(Items.uid))
+        if before is not None:
+            query = query.where(tuple_(Items.created_at, Items.uid) < await item_position(before, session))
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+
+    async def get_all_items(self, session:AsyncSession, limit:int | None = None, before:str | None = None, filters:ItemFilters | None = None):
 
         try:
             logger.info("Getting all items: getting data from databases..")
-            query = select(Items).order_by(desc(Items.created_at))
-            results = await session.exec(query)
-            return results.all()
+            results = await session.exec(await self._list_query(filters, limit, before, session))
+            return results.mappings().all()
         except Exception as e:
             logger.error(f"DB Error: {e}")
             raise e
     
 
-    async def get_user_items(self, user_uid:str, session:AsyncSession):
+    async def get_user_items(self, user_uid:str, session:AsyncSession, limit:int | None = None, before:str | None = None, filters:ItemFilters | None = None):
         
         try:
             logger.info("Getting user item submission: getting data from databases..")
-            query = select(Items).where(Items.user_uid == user_uid).order_by(desc(Items.created_at))
+            query = (await self._list_query(filters, limit, before, session)).where(Items.user_uid == user_uid)
             results = await session.exec(query)
-            return results.all()
+            return results.mappings().all()
         except Exception as e:
             logger.error(f"DB Error: {e}")
             raise e
@@ -36,9 +107,67 @@ class ItemsService:
         
         try:
             logger.info("Getting item: getting data from databases..")
-            query = select(Items).where(Items.uid == item_uid)
-            result = await session.exec(query)
-            return result.first() if result is not None else None
+
+            async def fetch(session:AsyncSession):
+                result = await session.exec(select(Items).where(Items.uid == item_uid))
+                return result.first()
+
+            # a pallet scanned at several docks at once asks for the same item many times
+            return await item_flight.do(str(item_uid).lower(), session, fetch)
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise e
+
+
+    async def get_item_details(self, item_uid:str, session:AsyncSession, notes_limit:int = 10):
+        """Item with its tags, its `notes_limit` most recent notes and the total number of notes"""
+
+        try:
+            logger.info("Getting item details: getting data from databases..")
+            item = await self.get_item(item_uid, session)
+            if item is None:
+                return None
+            notes = await session.exec(
+                select(Notes)
+                .where(Notes.item_uid == item.uid)
+                .order_by(desc(Notes.created_at), desc(Notes.uid))
+                .limit(notes_limit)
+            )
+            notes_count = await stats_service.get_counter(ITEM_NOTES, item.uid, session)
+            return {**item.model_dump(), "tags": item.tags, "notes": notes.all(), "notes_count": notes_count}
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise e
+
+
+    async def get_items_details(self, item_uids:list, session:AsyncSession, notes_limit:int = 10):
+        """ItemDetails for many items at once, in the order asked for, plus the uids that don't exist"""
+
+        try:
+            logger.info("Getting items details: getting data from databases..")
+            item_uids = list(dict.fromkeys(item_uids))
+            wanted = any_(cast(item_uids, pg.ARRAY(pg.UUID)))
+
+            result = await session.exec(select(*[getattr(Items, name) for name in ITEM_FIELDS]).where(Items.uid == wanted))
+            items = {row["uid"]: dict(row) for row in result.mappings().all()}
+            found = list(items)
+            if found:
+                notes = await session.exec(RECENT_NOTES, params={"item_uids": found, "notes_limit": notes_limit})
+                tags = await session.exec(
+                    select(ItemTag.item_id, Tag).join(Tag, Tag.uid == ItemTag.tag_id).where(ItemTag.item_id == any_(cast(found, pg.ARRAY(pg.UUID))))
+                )
+                counts = await stats_service.get_counters([(ITEM_NOTES, uid) for uid in found], session)
+                for item in items.values():
+                    item.update(notes=[], tags=[], notes_count=counts[(ITEM_NOTES, str(item["uid"]))])
+                for note in notes.mappings().all():
+                    items[note["item_uid"]]["notes"].append(note)
+                for item_uid, tag in tags.all():
+                    items[item_uid]["tags"].append(tag)
+
+            return {
+                "items": [items[uid] for uid in item_uids if uid in items],
+                "missing": [uid for uid in item_uids if uid not in items],
+            }
         except Exception as e:
             logger.error(f"DB Error: {e}")
             raise e
@@ -52,10 +181,17 @@ class ItemsService:
             new_item = Items(
                 **item_data_dict
             )
-            new_item.stored_exp_date = datetime.strptime(item_data_dict["stored_exp_date"],"%Y-%m-%d")
+            new_item.stored_exp_date = datetime.strptime(item_data_dict["stored_exp_date"],"%Y-%m-%d").date()
             new_item.user_uid = user_uid
             
             session.add(new_item)
+            await stats_service.bump([
+                (USER_ITEMS, user_uid, 1),
+                (EXPIRING_WEEK, expiring_week_key(new_item.stored_exp_date), 1),
+            ], session)
+            # the uid is generated at flush
+            await session.flush()
+            await event_service.publish(ITEM_CREATED, {"item_uid": new_item.uid, "user_uid": user_uid}, session)
             await session.commit()
             await session.refresh(new_item)
             return new_item
@@ -64,20 +200,36 @@ class ItemsService:
             raise e
 
 
-    async def update_item(self, item_uid:str, update_data:ItemUpdate, session:AsyncSession):
+    async def update_item(self, item_uid:str, update_data:ItemUpdate, session:AsyncSession, expected_version:int | None = None):
         
         try:
-            updated_item = await self.get_item(item_uid, session)
+            logger.info("Updating item: updating data in database..")
+            statement = (
+                update(Items)
+                .where(Items.uid == item_uid)
+                .values(**update_data.model_dump(), version=Items.version + 1, updated_at=datetime.now())
+                .returning(*Items.__table__.c)
+                .execution_options(synchronize_session=False)
+            )
+            if expected_version is not None:
+                statement = statement.where(Items.version == expected_version)
+
+            result = await session.exec(statement)
+            updated_item = result.mappings().first()
             if updated_item is not None:
-                updated_item_dict = update_data.model_dump()
+                await event_service.publish(
+                    ITEM_UPDATED, {"item_uid": updated_item["uid"], "version": updated_item["version"]}, session
+                )
+            await session.commit()
 
-                for k,v in updated_item_dict.items():
-                    setattr(updated_item,k,v)
+            if updated_item is None and expected_version is not None:
+                # tell a stale version apart from a missing item
+                found = await session.exec(select(Items.uid).where(Items.uid == item_uid))
+                if found.first() is not None:
+                    logger.error("Updating item: version conflict")
+                    raise VersionConflict()
 
-                await session.commit()
-                return updated_item
-            
-            return None
+            return updated_item
         except Exception as e:
             logger.error(f"DB Error: {e}")
             raise e
@@ -86,14 +238,69 @@ class ItemsService:
     async def delete_item(self, item_uid:str, session:AsyncSession):
         
         try:
-            deleted_item = await self.get_item(item_uid, session)
+            logger.info("Deleting item: marking item as deleted..")
+            statement = (
+                update(Items)
+                .where(Items.uid == item_uid, Items.deleted_at.is_(None))
+                .values(deleted_at=datetime.now())
+                .returning(Items.uid, Items.user_uid, Items.stored_exp_date)
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.exec(statement)
+            deleted_item = result.first()
 
             if deleted_item is not None:
-                await session.delete(deleted_item)
+                # notes and tag links stay until the purge job removes them
+                tag_uids = await session.exec(
+                    select(ItemTag.tag_id).join(Tag, Tag.uid == ItemTag.tag_id).where(ItemTag.item_id == deleted_item.uid)
+                )
+                changes = [
+                    (USER_ITEMS, deleted_item.user_uid, -1),
+                    (EXPIRING_WEEK, expiring_week_key(deleted_item.stored_exp_date), -1),
+                ]
+                changes += [(TAG_ITEMS, tag_uid, -1) for tag_uid in tag_uids.all()]
+                note_authors = await session.exec(
+                    select(Notes.user_uid, func.count()).where(Notes.item_uid == deleted_item.uid).group_by(Notes.user_uid)
+                )
+                changes += [(USER_NOTES, user_uid, -count) for user_uid, count in note_authors.all()]
+                await stats_service.bump(changes, session)
+                await stats_service.drop(ITEM_NOTES, deleted_item.uid, session)
+                await event_service.publish(ITEM_DELETED, {"item_uid": deleted_item.uid}, session)
                 await session.commit()
                 return deleted_item
 
             return None
         except Exception as e:
             logger.error(f"DB Error: {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+
+    async def purge_deleted_items(self, deleted_before:datetime, batch_size:int, session:AsyncSession):
+        """Hard delete one batch of tombstoned items with their notes and tag links"""
+
+        try:
+            logger.info("Purging deleted items: deleting data from database..")
+            result = await session.exec(
+                text("""
+                    WITH batch AS (
+                        SELECT uid FROM items
+                        WHERE deleted_at < :deleted_before
+                        ORDER BY deleted_at
+                        LIMIT :batch_size
+                        FOR UPDATE SKIP LOCKED
+                    ),
+                    purged_notes AS (
+                        DELETE FROM notes n USING batch b WHERE n.item_uid = b.uid
+                    ),
+                    purged_links AS (
+                        DELETE FROM itemtag it USING batch b WHERE it.item_id = b.uid
+                    )
+                    DELETE FROM items i USING batch b WHERE i.uid = b.uid
+                """),
+                params={"deleted_before": deleted_before, "batch_size": batch_size},
+            )
+            await session.commit()
+            return result.rowcount
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise e
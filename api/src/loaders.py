@@ -0,0 +1,133 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from sqlalchemy import inspect
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.main import side_session
+from src.db.models import Items, Notes, User
+from src.metrics import LOADER_BATCH_SIZE
+from src.singleflight import merge_into
+from src.items.services import item_flight
+from src.userauth.services import user_flight
+from src.logging import logger
+
+
+BatchFn = Callable[[list, AsyncSession], Awaitable[dict[Hashable, Any]]]
+
+
+class DataLoader:
+    """Request-scoped batching and caching of lookups by key.
+
+    Every `load` made in the same event loop tick is collected and resolved
+    by a single `batch_fn(keys, session)` call, so independent lookups that
+    are awaited together (asyncio.gather) cost one round trip per entity
+    type. Batches run in their own short-lived session, which lets batches
+    of different loaders overlap; callers get the results merged into the
+    request session. Each running batch checks out a pool connection of its
+    own, so a request briefly holds one connection per concurrent loader on
+    top of its session's: add_note, which loads its item and user together
+    and then writes, holds up to three. Results, missing keys (None)
+    included, are cached for the rest of the request. Batch sessions don't
+    see the request's uncommitted writes, use loaders for reads only.
+    """
+    def __init__(self, name: str, batch_fn: BatchFn, session: AsyncSession) -> None:
+        self.name = name
+        self.batch_fn = batch_fn
+        self.session = session
+        self._cache: dict[Hashable, asyncio.Future] = {}
+        self._pending: list[Hashable] = []
+        # the loop keeps only weak references to tasks, hold on to running batches
+        self._batches: set[asyncio.Task] = set()
+
+    async def load(self, key: Hashable):
+        future = self._cache.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._cache[key] = future
+            self._pending.append(key)
+            if len(self._pending) == 1:
+                # let the rest of this tick queue up its keys first
+                asyncio.get_running_loop().call_soon(self._dispatch)
+        # shielded, one caller going away must not cancel the load for the others
+        result = await asyncio.shield(future)
+        if result is not None:
+            # the request session's own copy may carry unflushed changes,
+            # merging the batch snapshot would overwrite them
+            held = self.session.identity_map.get(inspect(result).key)
+            if held is not None:
+                return held
+        return await merge_into(self.session, result)
+
+    def _dispatch(self):
+        keys, self._pending = self._pending, []
+        batch = asyncio.create_task(self._run_batch(keys))
+        self._batches.add(batch)
+        batch.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, keys: list[Hashable]):
+        LOADER_BATCH_SIZE.labels(self.name).observe(len(keys))
+        try:
+            async with side_session(self.session) as session:
+                results = await self.batch_fn(keys, session)
+        except asyncio.CancelledError:
+            for key in keys:
+                self._cache.pop(key).cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Loader {self.name}: batch of {len(keys)} failed: {e}")
+            for key in keys:
+                # don't cache failures, a later load retries
+                self._cache.pop(key).set_exception(e)
+            return
+        for key in keys:
+            future = self._cache[key]
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+async def users_by_email(emails: list[str], session: AsyncSession):
+
+    async def fetch(session: AsyncSession):
+        result = await session.exec(select(User).where(User.email.in_(emails)))
+        return result.all()
+
+    # identical batches of concurrent requests, e.g. the current user of many
+    # requests by the same account, share one query
+    users = await user_flight.do(tuple(emails), session, fetch)
+    return {user.email: user for user in users}
+
+
+async def items_by_uid(item_uids: list[str], session: AsyncSession):
+
+    async def fetch(session: AsyncSession):
+        result = await session.exec(select(Items).where(Items.uid.in_(item_uids)))
+        return result.all()
+
+    items = await item_flight.do(tuple(item_uids), session, fetch)
+    return {str(item.uid): item for item in items}
+
+
+async def notes_by_uid(note_uids: list[str], session: AsyncSession):
+
+    # notes on live items only, like every other notes read
+    statement = select(Notes).join(Items, Items.uid == Notes.item_uid).where(Notes.uid.in_(note_uids))
+    result = await session.exec(statement)
+    return {str(note.uid): note for note in result.all()}
+
+
+class RequestLoaders:
+    def __init__(self, session: AsyncSession) -> None:
+        self.users_by_email = DataLoader("users_by_email", users_by_email, session)
+        self.items = DataLoader("items", items_by_uid, session)
+        self.notes = DataLoader("notes", notes_by_uid, session)
+
+
+def get_loaders(session: AsyncSession) -> RequestLoaders:
+    """Loaders of the request owning `session`, the request session lives
+    exactly as long as the request"""
+    loaders = session.info.get("loaders")
+    if loaders is None:
+        loaders = session.info["loaders"] = RequestLoaders(session)
+    return loaders
@@ -2,23 +2,34 @@ import logging
 import os
 from datetime import datetime
 
+from src.tracing import TraceIdFilter
 
-os.makedirs("logs", exist_ok=True)
-
-log_filename = datetime.now().strftime("%Y-%m-%d") + "_logs_warehouse.log"
-log_path = os.path.join("logs", log_filename)
 
 logger = logging.getLogger("uvicorn.access")
 # logger.disabled = True
 
-logger.handlers.clear()
 
-file_handler = logging.FileHandler(log_path)
-file_handler.setLevel(logging.INFO)
+def setup_logging():
+    """Send the app logger to today's file under logs/. Called from the app
+    lifespan and the Celery worker rather than at import, so importing the
+    package never touches the filesystem."""
+    if any(isinstance(handler, logging.FileHandler) for handler in logger.handlers):
+        return
+
+    os.makedirs("logs", exist_ok=True)
+
+    log_filename = datetime.now().strftime("%Y-%m-%d") + "_logs_warehouse.log"
+    log_path = os.path.join("logs", log_filename)
+
+    logger.handlers.clear()
+
+    file_handler = logging.FileHandler(log_path)
+    file_handler.setLevel(logging.INFO)
 
-formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-file_handler.setFormatter(formatter)
+    formatter = logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(trace_id)s - %(message)s"
+    )
+    file_handler.setFormatter(formatter)
+    file_handler.addFilter(TraceIdFilter())
 
-logger.addHandler(file_handler)
+    logger.addHandler(file_handler)
@@ -1,30 +1,80 @@
-from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from src.config import Config
+from src.mail_templates import check_template
+
+if TYPE_CHECKING:
+    from fastapi_mail import FastMail
 
 
 BASE_DIR = Path(__file__).resolve().parent
 
-mail_config = ConnectionConfig(
-    MAIL_USERNAME=Config.MAIL_USERNAME,
-    MAIL_PASSWORD=Config.MAIL_PASSWORD,
-    MAIL_FROM=Config.MAIL_FROM,
-    MAIL_PORT=Config.MAIL_PORT,
-    MAIL_SERVER=Config.MAIL_SERVER,
-    MAIL_FROM_NAME=Config.MAIL_FROM_NAME,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(BASE_DIR, "templates"),
-)
+# fastapi_mail and celery are imported on first use, the API only needs them
+# when it actually sends something
+
+_mail: "FastMail | None" = None
+
+
+def get_mail() -> "FastMail":
+    """Mail client, created in the process that sends (the Celery worker)
+    rather than at import in every process that imports this module"""
+    global _mail
+    if _mail is None:
+        from fastapi_mail import ConnectionConfig, FastMail
 
+        mail_config = ConnectionConfig(
+            MAIL_USERNAME=Config.MAIL_USERNAME,
+            MAIL_PASSWORD=Config.MAIL_PASSWORD,
+            MAIL_FROM=Config.MAIL_FROM,
+            MAIL_PORT=Config.MAIL_PORT,
+            MAIL_SERVER=Config.MAIL_SERVER,
+            MAIL_FROM_NAME=Config.MAIL_FROM_NAME,
+            MAIL_STARTTLS=True,
+            MAIL_SSL_TLS=False,
+            USE_CREDENTIALS=True,
+            VALIDATE_CERTS=True,
+            TEMPLATE_FOLDER=Path(BASE_DIR, "templates"),
+        )
+        _mail = FastMail(config=mail_config)
+    return _mail
 
-mail = FastMail(config=mail_config)
 
 def create_message(recipients: list[str], subject: str, body: str):
+    from fastapi_mail import MessageSchema, MessageType
+
     message = MessageSchema(
         recipients=recipients, subject=subject, body=body, subtype=MessageType.html
     )
-    return message
\ No newline at end of file
+    return message
+
+
+def chunked(items: list, size: int) -> list[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def dispatch_email(recipients: list[str], template_id: str, context: dict, bulk: bool = False):
+    """Queue the `template_id` email for the MAIL_BACKEND, the Celery worker
+    or this process's mail queue. Only the template id and its context are
+    queued, the body is rendered by whoever sends it. `bulk` sends are split
+    into chunks of MAIL_BULK_CHUNK_SIZE recipients; with Celery they run on
+    the mail.bulk queue, so verification and reset mails never wait behind
+    them."""
+    check_template(template_id)
+
+    if Config.MAIL_BACKEND == "inprocess":
+        from src.mail_queue import mail_queue
+
+        for recipient_chunk in chunked(recipients, Config.MAIL_BULK_CHUNK_SIZE) if bulk else [recipients]:
+            mail_queue.enqueue(recipient_chunk, template_id, context)
+        return
+
+    from src.celery_task import send_bulk_email, send_email
+
+    # one publish, the worker does the fan-out
+    task = send_bulk_email if bulk else send_email
+    task.delay(
+        recipients=recipients,
+        template_id=template_id,
+        context=context
+    )
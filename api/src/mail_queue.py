@@ -0,0 +1,203 @@
+import asyncio
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+
+from src.config import Config, SettingDefault
+from src.errors import ServiceOverloaded
+from src.mail_templates import precompile_templates, render_email
+from src.tracing import current_traceparent, tracer
+from src.logging import logger
+
+
+class OutgoingMail:
+    __slots__ = ("recipients", "template_id", "context", "traceparent", "message", "attempts")
+
+    def __init__(self, recipients: list[str], template_id: str, context: dict):
+        self.recipients = recipients
+        self.template_id = template_id
+        self.context = context
+        # the send is traced as part of the request that queued it
+        self.traceparent = current_traceparent()
+        self.message: EmailMessage | None = None
+        self.attempts = 0
+
+
+def build_message(recipients: list[str], template_id: str, context: dict) -> EmailMessage:
+    subject, html_message = render_email(template_id, context)
+    message = EmailMessage()
+    message["From"] = formataddr((Config.MAIL_FROM_NAME, Config.MAIL_FROM))
+    message["To"] = ", ".join(recipients)
+    message["Subject"] = subject
+    message["Message-ID"] = make_msgid()
+    message.set_content(html_message, subtype="html")
+    return message
+
+
+class MailQueue:
+    """Sends mail from inside the API worker, the MAIL_BACKEND=inprocess path.
+
+    Messages wait in a bounded queue; when it is full `enqueue` refuses with
+    ServiceOverloaded rather than letting memory grow. A single sender task
+    takes up to `batch_size` messages at a time and sends them over one SMTP
+    connection, which is kept open while mail keeps coming and closed after
+    `idle_timeout` seconds without any. Connection failures and 4xx replies
+    are retried with exponential backoff up to `max_retries` times, 5xx
+    replies are permanent. On shutdown the queue gets `drain_timeout` seconds
+    to empty before whatever is left is dropped and logged.
+    """
+
+    maxsize = SettingDefault("MAIL_QUEUE_SIZE")
+    batch_size = SettingDefault("MAIL_BATCH_SIZE")
+    max_retries = SettingDefault("MAIL_MAX_RETRIES")
+    backoff = SettingDefault("MAIL_RETRY_BACKOFF")
+    backoff_max = SettingDefault("MAIL_RETRY_BACKOFF_MAX")
+    idle_timeout = SettingDefault("MAIL_SMTP_IDLE_TIMEOUT")
+    drain_timeout = SettingDefault("MAIL_DRAIN_TIMEOUT")
+
+    def __init__(self, maxsize: int | None = None, batch_size: int | None = None, max_retries: int | None = None,
+                 backoff: float | None = None, backoff_max: float | None = None, idle_timeout: float | None = None,
+                 drain_timeout: float | None = None):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.idle_timeout = idle_timeout
+        self.drain_timeout = drain_timeout
+        self._queue: asyncio.Queue[OutgoingMail] | None = None
+        self._task: asyncio.Task | None = None
+        self._smtp = None
+        self._closing = False
+
+
+    def start(self):
+        precompile_templates()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+
+    def enqueue(self, recipients: list[str], template_id: str, context: dict):
+        if self._queue is None or self._closing:
+            raise RuntimeError("mail queue is not running")
+        try:
+            # rendered by the sender task, not in the request
+            self._queue.put_nowait(OutgoingMail(recipients, template_id, context))
+        except asyncio.QueueFull:
+            logger.error("Mail queue: queue is full, refusing message")
+            raise ServiceOverloaded()
+
+
+    async def _connect(self):
+        import aiosmtplib
+
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+        self._smtp = aiosmtplib.SMTP(
+            hostname=Config.MAIL_SERVER,
+            port=Config.MAIL_PORT,
+            username=Config.MAIL_USERNAME if Config.USE_CREDENTIALS else None,
+            password=Config.MAIL_PASSWORD if Config.USE_CREDENTIALS else None,
+            use_tls=Config.MAIL_SSL_TLS,
+            start_tls=Config.MAIL_STARTTLS,
+            validate_certs=Config.VALIDATE_CERTS,
+        )
+        await self._smtp.connect()
+        return self._smtp
+
+
+    async def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
+
+
+    async def _next_batch(self) -> list[OutgoingMail]:
+        try:
+            first = await asyncio.wait_for(self._queue.get(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            await self._disconnect()
+            first = await self._queue.get()
+        batch = [first]
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+
+    async def _send_batch(self, batch: list[OutgoingMail]):
+        import aiosmtplib
+
+        pending = list(batch)
+        while pending:
+            mail = pending[0]
+            if mail.message is None:
+                try:
+                    mail.message = build_message(mail.recipients, mail.template_id, mail.context)
+                except Exception as e:
+                    logger.error(f"Mail queue: cannot render {mail.template_id} email: {e!r}")
+                    pending.pop(0)
+                    continue
+            mail.attempts += 1
+            try:
+                with tracer.start_span("smtp.send", kind="client", traceparent=mail.traceparent,
+                                       attributes={"mail.recipients": len(mail.recipients), "mail.attempt": mail.attempts}):
+                    smtp = await self._connect()
+                    await smtp.send_message(mail.message)
+                pending.pop(0)
+            except aiosmtplib.SMTPRecipientsRefused as e:
+                logger.error(f"Mail queue: all recipients of {', '.join(mail.recipients)} refused: {e}")
+                pending.pop(0)
+            except aiosmtplib.SMTPResponseException as e:
+                if e.code >= 500:
+                    logger.error(f"Mail queue: {', '.join(mail.recipients)} rejected permanently: {e}")
+                    pending.pop(0)
+                    continue
+                await self._retry_later(mail, pending, e)
+            except (aiosmtplib.SMTPException, OSError) as e:
+                await self._disconnect()
+                await self._retry_later(mail, pending, e)
+
+
+    async def _retry_later(self, mail: OutgoingMail, pending: list[OutgoingMail], error: Exception):
+        if mail.attempts > self.max_retries:
+            logger.error(f"Mail queue: giving up on {', '.join(mail.recipients)} after {mail.attempts} attempts: {error}")
+            pending.pop(0)
+            return
+        delay = min(self.backoff_max, self.backoff * 2 ** (mail.attempts - 1))
+        logger.error(f"Mail queue: send failed, retrying in {delay}s: {error}")
+        await asyncio.sleep(delay)
+
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                logger.error(f"Mail queue: dropping a batch of {len(batch)}: {e!r}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._queue.join(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Mail queue: dropping {self._queue.qsize()} unsent messages on shutdown")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._disconnect()
+
+
+mail_queue = MailQueue()
@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from src.config import Config
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+
+# template_id -> (subject, template file)
+EMAIL_TEMPLATES = {
+    "welcome": ("Welcome to the Warehouse App", "email/welcome.html"),
+    "verify_email": ("Warehouse App email verification", "email/verify_email.html"),
+    "password_reset": ("Warehouse password reset", "email/password_reset.html"),
+}
+
+_environment: "Environment | None" = None
+
+
+def check_template(template_id: str):
+    if template_id not in EMAIL_TEMPLATES:
+        raise ValueError(f"unknown email template {template_id!r}")
+
+
+def get_environment() -> "Environment":
+    """Jinja environment of this process, jinja2 is imported on first use.
+
+    Compiled templates are kept in memory for the life of the process
+    (auto_reload off, so they are never stat'ed again) and their bytecode is
+    cached under MAIL_TEMPLATE_CACHE_DIR, so a new worker process loads the
+    compiled code instead of parsing the sources again.
+    """
+    global _environment
+    if _environment is None:
+        from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+        os.makedirs(Config.MAIL_TEMPLATE_CACHE_DIR, exist_ok=True)
+        _environment = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            autoescape=select_autoescape(["html"]),
+            bytecode_cache=FileSystemBytecodeCache(Config.MAIL_TEMPLATE_CACHE_DIR),
+            auto_reload=False,
+            cache_size=-1,
+        )
+    return _environment
+
+
+def precompile_templates():
+    """Load every email template, run once when a process that sends mail starts"""
+    environment = get_environment()
+    for _, template_name in EMAIL_TEMPLATES.values():
+        environment.get_template(template_name)
+
+
+def render_email(template_id: str, context: dict) -> tuple[str, str]:
+    """(subject, html body) of the `template_id` email"""
+    check_template(template_id)
+    subject, template_name = EMAIL_TEMPLATES[template_id]
+    return subject, get_environment().get_template(template_name).render(**context)
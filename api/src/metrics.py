@@ -0,0 +1,40 @@
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, make_asgi_app, multiprocess
+
+
+SINGLEFLIGHT_CALLS = Counter(
+    "warehouse_singleflight_calls_total",
+    "Single-flight reads by role: leader ran the query, follower shared it, "
+    "fallback gave up waiting and ran its own",
+    ["name", "role"],
+)
+
+QUERY_TIMEOUTS = Counter(
+    "warehouse_query_timeouts_total",
+    "Queries cancelled by Postgres for running past the route's statement_timeout",
+    ["budget"],
+)
+
+DISCONNECT_CANCELLATIONS = Counter(
+    "warehouse_disconnect_cancellations_total",
+    "Requests cancelled, with their in-flight queries, because the client went away",
+    ["method"],
+)
+
+LOADER_BATCH_SIZE = Histogram(
+    "warehouse_loader_batch_size",
+    "Keys resolved by one request loader batch",
+    ["loader"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 200),
+)
+
+
+def metrics_app():
+    """ASGI app serving the metrics. With several workers set
+    PROMETHEUS_MULTIPROC_DIR so every worker's samples are aggregated."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return make_asgi_app(registry=registry)
+    return make_asgi_app()
@@ -2,11 +2,289 @@ from fastapi import FastAPI
 from fastapi.requests import Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+import asyncio
 import time
+import zlib
 
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+from src.config import SettingDefault
+from src.metrics import DISCONNECT_CANCELLATIONS
+from src.tracing import tracer
 from src.logging import logger
 
 
+# polled every few seconds by orchestrators, not worth a log line each
+PROBE_PATHS = {"/healthz", "/readyz"}
+
+
+class CancelOnDisconnect:
+    """Cancels the request handler as soon as the client disconnects.
+
+    Cancelling the task cancels the asyncpg query it is awaiting, and the
+    session gives its connection back, instead of a query nobody is waiting
+    for anymore running to the end. Messages are read by a single watcher
+    and handed to the app through a queue, so the app still sees the body.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        messages = asyncio.Queue()
+
+        async def watch():
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        handler = asyncio.create_task(self.app(scope, messages.get, send))
+        watcher = asyncio.create_task(watch())
+        try:
+            await asyncio.wait({handler, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not handler.done():
+                logger.error(f"{scope['method']} - {scope['path']} - client disconnected, cancelling request")
+                DISCONNECT_CANCELLATIONS.labels(scope["method"]).inc()
+                handler.cancel()
+            try:
+                await handler
+            except asyncio.CancelledError:
+                if not handler.cancelled():
+                    raise
+        finally:
+            watcher.cancel()
+            if not handler.done():
+                handler.cancel()
+
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+# every event has to reach the client as soon as it is sent
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """br or gzip, whichever the client accepts (q > 0) and we support, br first"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+
+    for encoding in ("br", "gzip") if brotli is not None else ("gzip",):
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + self._compressor.flush() if flush else out
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compresses responses with br or gzip, negotiated through Accept-Encoding.
+
+    Body chunks are held back until `minimum_size` bytes or the end of the
+    body arrive; smaller responses go out untouched with their
+    Content-Length. A complete body is compressed in one piece, a stream
+    that goes past the threshold is compressed as it goes, each chunk
+    flushed so the client never waits on the compressor. Responses that are
+    already encoded, not text-like, or Server-Sent Events pass through.
+    Compressed responses get a weak ETag, the bytes differ per encoding.
+    """
+    minimum_size = SettingDefault("COMPRESSION_MIN_SIZE")
+    gzip_level = SettingDefault("COMPRESSION_GZIP_LEVEL")
+    brotli_quality = SettingDefault("COMPRESSION_BROTLI_QUALITY")
+
+    def __init__(self, app, minimum_size: int | None = None, gzip_level: int | None = None,
+                 brotli_quality: int | None = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return BrotliCompressor(self.brotli_quality)
+        return GzipCompressor(self.gzip_level)
+
+    def should_compress(self, status: int, headers: Headers) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            status not in (204, 304)
+            and "content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith(UNCOMPRESSED_TYPES)
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        held = []
+        held_size = 0
+        compressor = None
+        passthrough = False
+
+        async def release_held(more_body: bool):
+            nonlocal start
+            if start is not None:
+                await send(start)
+                start = None
+            if held:
+                await send({"type": "http.response.body", "body": b"".join(held), "more_body": more_body})
+                held.clear()
+
+        async def send_compressed(message):
+            nonlocal start, held_size, compressor, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # held back until the body shows how big the response is
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                passthrough = True
+                await release_held(more_body=True)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not self.should_compress(start["status"], headers):
+                    passthrough = True
+                    await release_held(more_body=True)
+                    await send(message)
+                    return
+
+                # BaseHTTPMiddleware sends even a one-piece body as a chunk plus
+                # an empty last one, so decide on the size of what has arrived
+                held.append(body)
+                held_size += len(body)
+                if held_size < self.minimum_size:
+                    if more_body:
+                        return
+                    passthrough = True
+                    await release_held(more_body=False)
+                    return
+
+                body = b"".join(held)
+                held.clear()
+                compressor = self.compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    # a real stream past the threshold, flushed chunk by chunk from here on
+                    del headers["Content-Length"]
+                    data = compressor.compress(body, flush=True)
+                else:
+                    data = compressor.compress(body, flush=False) + compressor.finish()
+                    headers["Content-Length"] = str(len(data))
+                await release_held(more_body=more_body)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            if more_body:
+                data = compressor.compress(body, flush=True)
+                if data:
+                    await send({"type": "http.response.body", "body": data, "more_body": True})
+            else:
+                data = compressor.compress(body, flush=False) + compressor.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class TracingMiddleware:
+    """Server span around every HTTP request.
+
+    Continues the caller's trace when it sends a `traceparent` header, and
+    returns the trace id as `X-Request-ID` so a client report can be matched
+    to the spans and log lines of that request. Probes and /metrics are not
+    traced.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in PROBE_PATHS or scope["path"].startswith("/metrics"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        client = scope.get("client")
+        attributes = {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+            "net.peer.ip": client[0] if client else "",
+        }
+        with tracer.start_span(f"{scope['method']} {scope['path']}", kind="server", attributes=attributes,
+                               traceparent=headers.get("traceparent")) as span:
+
+            async def send_traced(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    MutableHeaders(raw=message["headers"])["X-Request-ID"] = span.trace_id
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                # the router has matched by now, name the span after the route template
+                route = scope.get("route")
+                if route is not None and getattr(route, "path", None):
+                    span.name = f"{scope['method']} {route.path}"
+
+
 def register_middleware(app: FastAPI):
     #ini pake dekorator karena middlewarenya kita buat sendiri (function style)
     @app.middleware("http")
@@ -14,6 +292,8 @@ def register_middleware(app: FastAPI):
         start_time = time.time()
 
         response = await call_next(request)
+        if request.url.path in PROBE_PATHS:
+            return response
         processing_time = time.time() - start_time
 
         message = f"{request.client.host}:{request.client.port} - {request.method} - {request.url.path} - {response.status_code} completed after {processing_time}s"
@@ -30,3 +310,9 @@ def register_middleware(app: FastAPI):
         allow_credentials=True,
     )
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=["localhost","127.0.0.1","0.0.0.0"])
+    # minimum size and levels come from the settings
+    app.add_middleware(CompressionMiddleware)
+    # a disconnect cancels everything below it
+    app.add_middleware(CancelOnDisconnect)
+    # outermost, so the request span covers all of the above
+    app.add_middleware(TracingMiddleware)
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.db.models import User
-from src.notes.schemas import CreateNote
+from src.notes.schemas import CreateNote, NotePage
 from src.userauth.dependencies import get_current_user, RoleChecker
+from src.admission import AdmissionControl, RateLimiter, StatementTimeout
 from src.db.main import get_session
 from .services import NotesService
 from src.logging import logger
@@ -15,13 +18,20 @@ notes_service = NotesService()
 
 admin_role_checker = Depends(RoleChecker(["admin"]))
 user_role_checker = Depends(RoleChecker(["user", "admin"]))
+notes_list_admission = Depends(AdmissionControl("notes_list"))
+notes_list_rate_limit = Depends(RateLimiter("notes_list", scope="user"))
+notes_list_timeout = Depends(StatementTimeout("notes_list"))
 
 
-@notes_router.get("/", dependencies=[user_role_checker])
-async def get_all_notes(session: AsyncSession = Depends(get_session)):
+@notes_router.get("/", response_model=NotePage, dependencies=[notes_list_timeout, notes_list_rate_limit, notes_list_admission, user_role_checker])
+async def get_all_notes(
+    limit: int = Query(default=50, ge=1, le=1000),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+    session: AsyncSession = Depends(get_session),
+):
 
     logger.info("Getting all notes: processing request..")
-    notes = await notes_service.get_all_notes(session)
+    notes = await notes_service.get_all_notes(session, limit=limit, cursor=cursor)
     logger.info("Getting all notes: returning result..")
 
     return notes
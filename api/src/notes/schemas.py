@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 import uuid
-from typing import Optional
+from typing import List, Optional
 
 
 
@@ -13,5 +13,9 @@ class Notes(BaseModel):
     created_at: datetime
     updated_at: datetime 
 
+class NotePage(BaseModel):
+    notes: List[Notes]
+    next_cursor: Optional[str] = None
+
 class CreateNote(BaseModel):
     note_text: str
\ No newline at end of file
@@ -1,32 +1,42 @@
+import asyncio
 from fastapi import HTTPException, status
 from sqlmodel import desc, select
+from sqlalchemy import tuple_
 
-from src.db.models import Notes
+from src.db.models import Items, Notes
 from src.notes.schemas import CreateNote
-from src.userauth.services import UserService
-from src.items.services import ItemsService
+from src.stats.services import StatsService, ITEM_NOTES, USER_NOTES
 from sqlmodel.ext.asyncio.session import AsyncSession
+from src.events.services import EventService, NOTE_CREATED, NOTE_DELETED
+from src.pagination import encode_cursor, decode_cursor
+from src.loaders import get_loaders
 from src.errors import (
     ItemNotFound,
     UserNotFound
 )
+from src.tracing import traced
 from src.logging import logger
 
 
-item_service = ItemsService()
-user_service = UserService()
+stats_service = StatsService()
+event_service = EventService()
 
 
+@traced
 class NotesService:
     async def add_note(self, user_email:str, item_uid:str, note_data:CreateNote, session:AsyncSession):
         
         try:
             logger.info("Adding item note: inserting note to database..")
-            item = await item_service.get_item(item_uid, session)
+            loaders = get_loaders(session)
+            # independent lookups, one overlapping round trip each
+            item, user = await asyncio.gather(
+                loaders.items.load(str(item_uid).lower()),
+                loaders.users_by_email.load(user_email),
+            )
             if not item:
                 logger.error("Adding item note: item not found")
                 raise ItemNotFound()
-            user = await user_service.get_user_by_email(user_email, session)
             if not user:
                 logger.error("Adding item note: user not found")
                 raise UserNotFound()
@@ -36,6 +46,9 @@ class NotesService:
             new_note.user = user
             new_note.item = item
             session.add(new_note)
+            await stats_service.bump([(ITEM_NOTES, item.uid, 1), (USER_NOTES, user.uid, 1)], session)
+            await session.flush()
+            await event_service.publish(NOTE_CREATED, {"note_uid": new_note.uid, "item_uid": item.uid}, session)
             await session.commit()
             await session.refresh(new_note)
             return new_note
@@ -51,7 +64,7 @@ class NotesService:
 
         try:
             logger.info("Getting note: getting data from databases..")
-            statement = select(Notes).where(Notes.uid == note_uid)
+            statement = select(Notes).join(Items, Items.uid == Notes.item_uid).where(Notes.uid == note_uid)
             result = await session.exec(statement)
             return result.first()
         except Exception as e:
@@ -59,32 +72,81 @@ class NotesService:
             raise
     
 
-    async def get_all_notes(self, session: AsyncSession):
+    async def _notes_page(self, statement, limit: int, cursor: str | None, session: AsyncSession):
+        """One page of notes, newest first, continuing after `cursor`"""
+
+        after = decode_cursor(cursor)
+        if after is not None:
+            statement = statement.where(tuple_(Notes.created_at, Notes.uid) < tuple_(*after))
+        statement = statement.order_by(desc(Notes.created_at), desc(Notes.uid)).limit(limit)
+        result = await session.exec(statement)
+        notes = result.all()
+        next_cursor = encode_cursor(notes[-1].created_at, notes[-1].uid) if len(notes) == limit else None
+        return {"notes": notes, "next_cursor": next_cursor}
+
+
+    async def get_all_notes(self, session: AsyncSession, limit: int = 50, cursor: str | None = None):
 
         try:
             logger.info("Getting all notes: getting data from databases..")
-            statement = select(Notes).order_by(desc(Notes.created_at))
-            result = await session.exec(statement)
-            return result.all()
+            # notes on live items only, a deleted item's notes wait for the purge
+            statement = select(Notes).join(Items, Items.uid == Notes.item_uid)
+            return await self._notes_page(statement, limit, cursor, session)
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
+
+
+    async def get_item_notes(self, item_uid: str, session: AsyncSession, limit: int = 50, cursor: str | None = None):
+
+        try:
+            logger.info("Getting item notes: getting data from databases..")
+            item = await session.exec(select(Items.uid).where(Items.uid == item_uid))
+            if item.first() is None:
+                logger.error("Getting item notes: item not found")
+                raise ItemNotFound()
+            # ix_notes_item_uid_created_at_uid serves both the filter and the order
+            statement = select(Notes).where(Notes.item_uid == item_uid)
+            return await self._notes_page(statement, limit, cursor, session)
         except Exception as e:
             logger.error(f"DB Error: {e}")
             raise
     
 
+    async def get_user_notes(self, user_uid: str, session: AsyncSession, limit: int = 50, cursor: str | None = None):
+
+        try:
+            logger.info("Getting user notes: getting data from databases..")
+            # notes on live items only, the rows the user_notes counter counts;
+            # ix_notes_user_uid_created_at_uid drives, each note probes its item
+            statement = select(Notes).join(Items, Items.uid == Notes.item_uid).where(Notes.user_uid == user_uid)
+            return await self._notes_page(statement, limit, cursor, session)
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
+
+
     async def delete_note_from_item(self, note_uid: str, user_email: str, session: AsyncSession):
 
         try:
             logger.info("Deleting note: getting data from databases..")
-            user = await user_service.get_user_by_email(user_email, session)
-            note = await self.get_note(note_uid, session)
-            
-            if not note or (note.user is not user):
+            loaders = get_loaders(session)
+            user, note = await asyncio.gather(
+                loaders.users_by_email.load(user_email),
+                loaders.notes.load(str(note_uid).lower()),
+            )
+
+            # the loader leaves out notes of deleted items, delete_item has
+            # already taken them off the counters
+            if not note or not user or note.user_uid != user.uid:
                 logger.error("Deleting note: note not found")
                 raise HTTPException(
                     detail="Cannot delete this note",
                     status_code=status.HTTP_403_FORBIDDEN,
                 )
             
+            await stats_service.bump([(ITEM_NOTES, note.item_uid, -1), (USER_NOTES, note.user_uid, -1)], session)
+            await event_service.publish(NOTE_DELETED, {"note_uid": note.uid, "item_uid": note.item_uid}, session)
             await session.delete(note)
             await session.commit()
             return note
@@ -0,0 +1,22 @@
+import base64
+import uuid
+from datetime import datetime
+
+from src.errors import InvalidCursor
+
+
+def encode_cursor(created_at: datetime, uid: uuid.UUID) -> str:
+    """Opaque cursor pointing just past the row (created_at, uid)"""
+    raw = f"{created_at.isoformat()}|{uid}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> tuple[datetime, uuid.UUID] | None:
+    if cursor is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, uid = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(uid)
+    except ValueError:
+        raise InvalidCursor()
@@ -0,0 +1,45 @@
+"""Production entry point, run with `python -m src.server`.
+
+Starts WEB_WORKERS uvicorn worker processes (the CPU count when 0) on uvloop
+and httptools. On SIGTERM the server stops accepting, lets in-flight requests
+finish for up to WEB_GRACEFUL_TIMEOUT seconds, then runs the app lifespan
+shutdown, which closes the database pool and the Redis client of each worker.
+"""
+import os
+import tempfile
+
+import uvicorn
+
+from src.config import Config
+
+
+def worker_count() -> int:
+    return Config.WEB_WORKERS or os.cpu_count() or 1
+
+
+def main():
+    workers = worker_count()
+    if workers > 1:
+        # every worker keeps its own metric values, prometheus_client merges
+        # them from this directory when /metrics is scraped
+        os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="warehouse-metrics-"))
+
+    uvicorn.run(
+        "src:app",
+        host=Config.WEB_HOST,
+        port=Config.WEB_PORT,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=Config.WEB_BACKLOG,
+        timeout_keep_alive=Config.WEB_KEEPALIVE,
+        timeout_graceful_shutdown=Config.WEB_GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=Config.WEB_FORWARDED_ALLOW_IPS,
+        # the logging middleware already writes one line per request
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
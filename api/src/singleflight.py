@@ -0,0 +1,79 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.main import side_session
+from src.metrics import SINGLEFLIGHT_CALLS
+from src.logging import logger
+
+
+async def merge_into(session: AsyncSession, result):
+    """Copy a detached, unmodified result into `session`. load=False takes
+    the already loaded state as is, without going back to the database."""
+    if result is None:
+        return None
+    if isinstance(result, list):
+        return [await session.merge(obj, load=False) for obj in result]
+    return await session.merge(result, load=False)
+
+
+class SingleFlight:
+    """Collapses concurrent identical reads into one query.
+
+    The first caller for a key (the leader) runs `fetch` in a short-lived
+    session of its own. Callers arriving while it is in flight (followers)
+    wait for the same result instead of taking a pool connection of their
+    own. Everyone, the leader included, merges that detached snapshot into
+    their own session, so no caller ever sees another request's changes to
+    it. A follower waits at most `timeout` seconds and then fetches on its
+    own, so one slow query can't hold a whole herd hostage. Nothing is kept
+    once the flight lands.
+    """
+    def __init__(self, name: str, timeout: float | None = None) -> None:
+        self.name = name
+        self._timeout = timeout
+        self._flights: dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def timeout(self) -> float:
+        return self._timeout or Config.SINGLEFLIGHT_TIMEOUTS.get(self.name, Config.SINGLEFLIGHT_DEFAULT_TIMEOUT)
+
+    async def do(self, key: Hashable, session: AsyncSession, fetch: Callable[[AsyncSession], Awaitable[Any]]):
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                break
+            try:
+                result = await asyncio.wait_for(asyncio.shield(flight), timeout=self.timeout)
+                SINGLEFLIGHT_CALLS.labels(self.name, "follower").inc()
+                return await merge_into(session, result)
+            except asyncio.TimeoutError:
+                logger.error(f"Single flight {self.name}: gave up waiting after {self.timeout}s")
+                SINGLEFLIGHT_CALLS.labels(self.name, "fallback").inc()
+                return await fetch(session)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # the leader's request went away, take over the flight
+
+        flight = asyncio.get_running_loop().create_future()
+        # the leader reports its own errors, don't warn about unretrieved ones
+        flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._flights[key] = flight
+        SINGLEFLIGHT_CALLS.labels(self.name, "leader").inc()
+        try:
+            async with side_session(session) as flight_session:
+                result = await fetch(flight_session)
+            flight.set_result(result)
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        return await merge_into(session, result)
@@ -0,0 +1,72 @@
+import uuid
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.main import get_session
+from src.userauth.dependencies import RoleChecker
+from .schemas import UserItemsCount, ItemNotesCount, TagUsageCount, ExpiringWeek
+from .services import StatsService, USER_ITEMS, ITEM_NOTES, TAG_ITEMS
+from src.logging import logger
+
+
+# "/stats"
+stats_router = APIRouter()
+stats_service = StatsService()
+user_role_checker = Depends(RoleChecker(["user", "admin"]))
+
+
+@stats_router.get("/users", response_model=List[UserItemsCount], dependencies=[user_role_checker])
+async def get_top_users(limit: int = Query(default=10, ge=1, le=100), session: AsyncSession = Depends(get_session)):
+
+    logger.info("Getting top users by items: processing request..")
+    counters = await stats_service.get_top(USER_ITEMS, limit, session)
+    logger.info("Getting top users by items: returning result..")
+    return [{"user_uid": c.key, "items_count": c.value} for c in counters]
+
+
+@stats_router.get("/users/{user_uid}", response_model=UserItemsCount, dependencies=[user_role_checker])
+async def get_user_items_count(user_uid: uuid.UUID, session: AsyncSession = Depends(get_session)):
+
+    logger.info(f"Getting items count of user {user_uid}: processing request..")
+    count = await stats_service.get_counter(USER_ITEMS, user_uid, session)
+    return {"user_uid": user_uid, "items_count": count}
+
+
+@stats_router.get("/items/{item_uid}", response_model=ItemNotesCount, dependencies=[user_role_checker])
+async def get_item_notes_count(item_uid: uuid.UUID, session: AsyncSession = Depends(get_session)):
+
+    logger.info(f"Getting notes count of item {item_uid}: processing request..")
+    count = await stats_service.get_counter(ITEM_NOTES, item_uid, session)
+    return {"item_uid": item_uid, "notes_count": count}
+
+
+@stats_router.get("/tags", response_model=List[TagUsageCount], dependencies=[user_role_checker])
+async def get_top_tags(limit: int = Query(default=10, ge=1, le=100), session: AsyncSession = Depends(get_session)):
+
+    logger.info("Getting top tags by usage: processing request..")
+    counters = await stats_service.get_top(TAG_ITEMS, limit, session)
+    logger.info("Getting top tags by usage: returning result..")
+    return [{"tag_uid": c.key, "usage_count": c.value} for c in counters]
+
+
+@stats_router.get("/tags/{tag_uid}", response_model=TagUsageCount, dependencies=[user_role_checker])
+async def get_tag_usage_count(tag_uid: uuid.UUID, session: AsyncSession = Depends(get_session)):
+
+    logger.info(f"Getting usage count of tag {tag_uid}: processing request..")
+    count = await stats_service.get_counter(TAG_ITEMS, tag_uid, session)
+    return {"tag_uid": tag_uid, "usage_count": count}
+
+
+@stats_router.get("/expiring", response_model=List[ExpiringWeek], dependencies=[user_role_checker])
+async def get_expiring_per_week(
+    from_date: Optional[date] = None,
+    weeks: int = Query(default=8, ge=1, le=104),
+    session: AsyncSession = Depends(get_session),
+):
+
+    logger.info("Getting expiring items per week: processing request..")
+    expiring = await stats_service.get_expiring(from_date or date.today(), weeks, session)
+    logger.info("Getting expiring items per week: returning result..")
+    return expiring
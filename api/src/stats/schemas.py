@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+import uuid
+from datetime import date
+
+
+class UserItemsCount(BaseModel):
+    user_uid: uuid.UUID
+    items_count: int
+
+class ItemNotesCount(BaseModel):
+    item_uid: uuid.UUID
+    notes_count: int
+
+class TagUsageCount(BaseModel):
+    tag_uid: uuid.UUID
+    usage_count: int
+
+class ExpiringWeek(BaseModel):
+    week_start: date
+    items_count: int
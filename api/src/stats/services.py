@@ -0,0 +1,134 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select, desc
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.models import StatCounter
+from src.logging import logger
+
+
+USER_ITEMS = "user_items"
+ITEM_NOTES = "item_notes"
+USER_NOTES = "user_notes"
+TAG_ITEMS = "tag_items"
+EXPIRING_WEEK = "expiring_week"
+
+
+def week_start(day: date) -> date:
+    """Monday of the ISO week `day` falls in"""
+    if isinstance(day, datetime):
+        day = day.date()
+    return day - timedelta(days=day.weekday())
+
+
+def expiring_week_key(day: date) -> str:
+    return week_start(day).isoformat()
+
+
+class StatsService:
+    """Reads and maintains the aggregate counters.
+
+    The bump/drop methods don't commit, they are meant to run inside the
+    caller's transaction so counters change atomically with the data.
+    """
+
+    async def bump(self, changes: list[tuple[str, str, int]], session: AsyncSession):
+
+        totals = defaultdict(int)
+        for kind, key, delta in changes:
+            if key is not None and delta:
+                totals[(kind, str(key))] += delta
+        if not totals:
+            return
+
+        # sorted so concurrent writers lock counter rows in the same order
+        rows = [
+            {"kind": kind, "key": key, "value": delta}
+            for (kind, key), delta in sorted(totals.items())
+        ]
+        statement = insert(StatCounter).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[StatCounter.kind, StatCounter.key],
+            set_={"value": StatCounter.value + statement.excluded.value},
+        )
+        await session.exec(statement)
+
+
+    async def drop(self, kind: str, key: str, session: AsyncSession):
+
+        await session.exec(
+            delete(StatCounter).where(StatCounter.kind == kind, StatCounter.key == str(key))
+        )
+
+
+    async def drop_many(self, kind: str, keys: list[str], session: AsyncSession):
+
+        if keys:
+            await session.exec(
+                delete(StatCounter).where(StatCounter.kind == kind, StatCounter.key.in_([str(k) for k in keys]))
+            )
+
+
+    async def get_counter(self, kind: str, key: str, session: AsyncSession) -> int:
+
+        try:
+            logger.info(f"Getting {kind} counter: getting data from databases..")
+            statement = select(StatCounter.value).where(StatCounter.kind == kind, StatCounter.key == str(key))
+            result = await session.exec(statement)
+            return result.first() or 0
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
+
+
+    async def get_counters(self, keys: list[tuple[str, str]], session: AsyncSession) -> dict[tuple[str, str], int]:
+        """Several counters in one primary key lookup, missing ones are 0"""
+
+        try:
+            logger.info("Getting counters: getting data from databases..")
+            keys = [(kind, str(key)) for kind, key in keys]
+            statement = select(StatCounter.kind, StatCounter.key, StatCounter.value).where(
+                tuple_(StatCounter.kind, StatCounter.key).in_(keys)
+            )
+            result = await session.exec(statement)
+            values = {(row.kind, row.key): row.value for row in result.all()}
+            return {key: values.get(key, 0) for key in keys}
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
+
+
+    async def get_top(self, kind: str, limit: int, session: AsyncSession):
+
+        try:
+            logger.info(f"Getting top {kind} counters: getting data from databases..")
+            statement = (
+                select(StatCounter)
+                .where(StatCounter.kind == kind)
+                .order_by(desc(StatCounter.value))
+                .limit(limit)
+            )
+            result = await session.exec(statement)
+            return result.all()
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
+
+
+    async def get_expiring(self, from_date: date, weeks: int, session: AsyncSession):
+
+        try:
+            logger.info("Getting expiring items per week: getting data from databases..")
+            first = week_start(from_date)
+            keys = [(first + timedelta(weeks=n)).isoformat() for n in range(weeks)]
+            statement = select(StatCounter).where(
+                StatCounter.kind == EXPIRING_WEEK, StatCounter.key.in_(keys)
+            )
+            result = await session.exec(statement)
+            counts = {counter.key: counter.value for counter in result.all()}
+            return [{"week_start": key, "items_count": counts.get(key, 0)} for key in keys]
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
@@ -1,22 +1,28 @@
-from typing import List
+import uuid
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Query, Response, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 from src.userauth.dependencies import RoleChecker
-from src.items.schemas import Items
+from src.admission import AdmissionControl, RateLimiter, StatementTimeout
+from src.items.schemas import Items, ItemPage
 from src.db.main import get_session
 from .schemas import TagAddModel, TagCreateModel, TagModel
 from .services import TagService
+from src.etags import format_etag, parse_if_match
 from src.logging import logger
 
 tags_router = APIRouter()
 tag_service = TagService()
 user_role_checker = Depends(RoleChecker(["user", "admin"]))
+tags_list_admission = Depends(AdmissionControl("tags_list"))
+tags_list_rate_limit = Depends(RateLimiter("tags_list", scope="user"))
+tags_list_timeout = Depends(StatementTimeout("tags_list"))
 
 
-@tags_router.get("/", response_model=List[TagModel], dependencies=[user_role_checker])
+@tags_router.get("/", response_model=List[TagModel], dependencies=[tags_list_timeout, tags_list_rate_limit, tags_list_admission, user_role_checker])
 async def get_all_tags(session: AsyncSession = Depends(get_session)):
 
     logger.info("Getting all tags: processing request..")
@@ -26,6 +32,38 @@ async def get_all_tags(session: AsyncSession = Depends(get_session)):
     return tags
 
 
+@tags_router.get("/items", response_model=ItemPage, dependencies=[tags_list_timeout, tags_list_rate_limit, tags_list_admission, user_role_checker])
+async def get_items_by_tags(
+    tag: List[uuid.UUID] = Query(min_length=1, max_length=20, description="tag uid, repeat for several tags"),
+    mode: Literal["and", "or"] = Query(default="or", description="match all tags or any of them"),
+    limit: int = Query(default=50, ge=1, le=1000),
+    before: Optional[uuid.UUID] = Query(default=None, description="next_cursor of the previous page"),
+    session: AsyncSession = Depends(get_session),
+):
+
+    logger.info("Getting items by tags: processing request..")
+    page = await tag_service.get_items_by_tags(tag, mode, session, limit=limit, before=before)
+    logger.info("Getting items by tags: returning result..")
+
+    return page
+
+
+@tags_router.get("/{tag_uid}/items", response_model=ItemPage, dependencies=[tags_list_timeout, tags_list_rate_limit, tags_list_admission, user_role_checker])
+async def get_tag_items(
+    tag_uid: str,
+    limit: int = Query(default=50, ge=1, le=1000),
+    before: Optional[uuid.UUID] = Query(default=None, description="next_cursor of the previous page"),
+    count: bool = Query(default=False, description="include the number of items carrying the tag"),
+    session: AsyncSession = Depends(get_session),
+):
+
+    logger.info(f"Getting items of tag {tag_uid}: processing request..")
+    page = await tag_service.get_tag_items(tag_uid, session, limit=limit, before=before, with_count=count)
+    logger.info("Getting items of tag: returning result..")
+
+    return page
+
+
 @tags_router.post("/", response_model=TagModel, status_code=status.HTTP_201_CREATED, dependencies=[user_role_checker])
 async def add_tag(tag_data: TagCreateModel, session: AsyncSession = Depends(get_session)) -> TagModel:
 
@@ -49,11 +87,12 @@ async def add_tags_to_item(item_uid: str, tag_data: TagAddModel, session: AsyncS
 
 
 @tags_router.put("/{tag_uid}", response_model=TagModel, dependencies=[user_role_checker])
-async def update_tag(tag_uid: str, tag_update_data: TagCreateModel, session: AsyncSession = Depends(get_session)) -> TagModel:
+async def update_tag(tag_uid: str, tag_update_data: TagCreateModel, response: Response, if_match: Optional[str] = Header(default=None), session: AsyncSession = Depends(get_session)) -> TagModel:
     
     logger.info(f"Updating tag {tag_uid}: processing request..")
-    updated_tag = await tag_service.update_tag(tag_uid, tag_update_data, session)
+    updated_tag = await tag_service.update_tag(tag_uid, tag_update_data, session, expected_version=parse_if_match(if_match))
     logger.info("Updating tag: returning result..")
+    response.headers["ETag"] = format_etag(updated_tag["version"])
 
     return updated_tag
 
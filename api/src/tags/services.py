@@ -1,32 +1,47 @@
 from fastapi import status
 from fastapi.exceptions import HTTPException
 from sqlmodel import desc, select
+from sqlalchemy import func, tuple_, union_all, update, text
+from datetime import datetime
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.items.services import ItemsService
-from src.db.models import Tag
+from src.items.services import ItemsService, item_position
+from src.db.models import Items, ItemTag, Tag
+from src.items.schemas import ITEM_FIELDS
+from src.stats.services import StatsService, TAG_ITEMS
+from src.events.services import EventService, ITEM_TAGGED, TAG_UPDATED, TAG_DELETED
 from .schemas import TagAddModel, TagCreateModel
 from src.errors import (
     TagNotFound,
     TagAlreadyExists,
-    ItemNotFound
+    ItemNotFound,
+    VersionConflict
 )
+from src.singleflight import SingleFlight
+from src.tracing import traced
 from src.logging import logger
 
 
 item_service = ItemsService()
+stats_service = StatsService()
+event_service = EventService()
+tags_flight = SingleFlight("tags")
 
 
 
+@traced
 class TagService:
 
     async def get_tags(self, session: AsyncSession):
 
         try:
             logger.info("Getting all tags: getting data from databases..")
-            statement = select(Tag).order_by(desc(Tag.created_at))
-            result = await session.exec(statement)
-            return result.all()
+
+            async def fetch(session: AsyncSession):
+                result = await session.exec(select(Tag).order_by(desc(Tag.created_at), desc(Tag.uid)))
+                return result.all()
+
+            return await tags_flight.do("all", session, fetch)
         except Exception as e:
             logger.error(f"DB Error: {e}")
             raise
@@ -41,6 +56,8 @@ class TagService:
                 logger.error("Adding tags to item: item not found")
                 raise ItemNotFound()
 
+            linked = {tag.uid for tag in item.tags}
+            new_links = []
             for tag_item in tag_data.tags:
                 result = await session.exec(
                     select(Tag).where(Tag.name == tag_item.name)
@@ -49,9 +66,21 @@ class TagService:
                 tag = result.one_or_none()
                 if not tag:
                     tag = Tag(name=tag_item.name)
-
-                item.tags.append(tag)
-            session.add(item)
+                    session.add(tag)
+                elif tag.uid in linked or tag in new_links:
+                    continue
+
+                new_links.append(tag)
+            # new tags get their uid at flush
+            await session.flush()
+            # written directly rather than through item.tags, which can't fill item_created_at
+            session.add_all(
+                ItemTag(item_id=item.uid, tag_id=tag.uid, item_created_at=item.created_at) for tag in new_links
+            )
+            await session.flush()
+            await stats_service.bump([(TAG_ITEMS, tag.uid, 1) for tag in new_links], session)
+            if new_links:
+                await event_service.publish(ITEM_TAGGED, {"item_uid": item.uid, "tags": [tag.name for tag in new_links]}, session)
             await session.commit()
             await session.refresh(item)
             return item
@@ -76,6 +105,102 @@ class TagService:
 
 
 
+    def _item_page(self, items, limit: int, count: int | None = None):
+
+        next_cursor = items[-1]["uid"] if len(items) == limit else None
+        return {"items": items, "next_cursor": next_cursor, "count": count}
+
+
+    async def get_tag_items(self, tag_uid: str, session: AsyncSession, limit: int = 50, before: str | None = None, with_count: bool = False):
+
+        try:
+            logger.info("Getting tag items: getting data from databases..")
+            tag = await self.get_tag_by_uid(tag_uid, session)
+            if not tag:
+                logger.error("Getting tag items: tag not found")
+                raise TagNotFound()
+            position = await item_position(before, session) if before is not None else None
+
+            # walks ix_itemtag_tag_id_item_created_at_item_id backwards from `before`, newest items first
+            query = (
+                select(*[getattr(Items, name) for name in ITEM_FIELDS])
+                .join(ItemTag, ItemTag.item_id == Items.uid)
+                .where(ItemTag.tag_id == tag.uid)
+                .order_by(desc(ItemTag.item_created_at), desc(ItemTag.item_id))
+                .limit(limit)
+            )
+            if position is not None:
+                query = query.where(tuple_(ItemTag.item_created_at, ItemTag.item_id) < position)
+            result = await session.exec(query)
+            items = result.mappings().all()
+
+            count = await stats_service.get_counter(TAG_ITEMS, tag.uid, session) if with_count else None
+            return self._item_page(items, limit, count)
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
+
+
+    async def get_items_by_tags(self, tag_uids: list[str], mode: str, session: AsyncSession, limit: int = 50, before: str | None = None):
+        """Items carrying any (mode "or") or all (mode "and") of the tags"""
+
+        try:
+            logger.info("Getting items by tags: getting data from databases..")
+            tag_uids = list(dict.fromkeys(tag_uids))
+            position = await item_position(before, session) if before is not None else None
+            item_columns = [getattr(Items, name) for name in ITEM_FIELDS]
+            if mode == "and":
+                matched = (
+                    select(ItemTag.item_id)
+                    .join(Tag, Tag.uid == ItemTag.tag_id)
+                    .where(ItemTag.tag_id.in_(tag_uids))
+                    .group_by(ItemTag.item_id)
+                    .having(func.count() == len(tag_uids))
+                )
+                if position is not None:
+                    matched = matched.where(tuple_(ItemTag.item_created_at, ItemTag.item_id) < position)
+                query = (
+                    select(*item_columns)
+                    .where(Items.uid.in_(matched))
+                    .order_by(desc(Items.created_at), desc(Items.uid))
+                    .limit(limit)
+                )
+            else:
+                # the newest `limit` items of every tag, each one bounded range scan
+                # on ix_itemtag_tag_id_item_created_at_item_id; the page is among them
+                per_tag = []
+                for tag_uid in tag_uids:
+                    newest = (
+                        select(ItemTag.item_id, ItemTag.item_created_at)
+                        .join(Tag, Tag.uid == ItemTag.tag_id)
+                        .join(Items, Items.uid == ItemTag.item_id)
+                        .where(ItemTag.tag_id == tag_uid)
+                        .order_by(desc(ItemTag.item_created_at), desc(ItemTag.item_id))
+                        .limit(limit)
+                    )
+                    if position is not None:
+                        newest = newest.where(tuple_(ItemTag.item_created_at, ItemTag.item_id) < position)
+                    per_tag.append(newest)
+                matched = union_all(*per_tag).subquery("matched")
+                page = (
+                    select(matched.c.item_id, matched.c.item_created_at)
+                    .distinct()
+                    .order_by(desc(matched.c.item_created_at), desc(matched.c.item_id))
+                    .limit(limit)
+                    .subquery("page")
+                )
+                query = (
+                    select(*item_columns)
+                    .join(page, page.c.item_id == Items.uid)
+                    .order_by(desc(page.c.item_created_at), desc(page.c.item_id))
+                )
+            result = await session.exec(query)
+            return self._item_page(result.mappings().all(), limit)
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
+
+
     async def add_tag(self, tag_data: TagCreateModel, session: AsyncSession):
         
         try:
@@ -101,18 +226,33 @@ class TagService:
 
 
 
-    async def update_tag(self, tag_uid, tag_update_data: TagCreateModel, session: AsyncSession):
+    async def update_tag(self, tag_uid, tag_update_data: TagCreateModel, session: AsyncSession, expected_version: int | None = None):
         
         try:
             logger.info(f"Updating tag: updating data in database..")
-            tag = await self.get_tag_by_uid(tag_uid, session)
+            statement = (
+                update(Tag)
+                .where(Tag.uid == tag_uid)
+                .values(**tag_update_data.model_dump(), version=Tag.version + 1)
+                .returning(*Tag.__table__.c)
+                .execution_options(synchronize_session=False)
+            )
+            if expected_version is not None:
+                statement = statement.where(Tag.version == expected_version)
 
-            update_data_dict = tag_update_data.model_dump()
-            for k, v in update_data_dict.items():
-                setattr(tag, k, v)
+            result = await session.exec(statement)
+            tag = result.mappings().first()
+            if tag is not None:
+                await event_service.publish(TAG_UPDATED, {"tag_uid": tag["uid"], "version": tag["version"]}, session)
+            await session.commit()
 
-                await session.commit()
-                await session.refresh(tag)
+            if tag is None:
+                exists = await session.exec(select(Tag.uid).where(Tag.uid == tag_uid))
+                if expected_version is not None and exists.first() is not None:
+                    logger.error("Updating tag: version conflict")
+                    raise VersionConflict()
+                logger.error("Updating tag: tag not found")
+                raise TagNotFound()
 
             return tag
         except Exception as e:
@@ -123,16 +263,64 @@ class TagService:
     async def delete_tag(self, tag_uid: str, session: AsyncSession):
         
         try:
-            logger.info(f"Deleting tag: deleting data from database..")
-            tag = await self.get_tag_by_uid(tag_uid,session)
+            logger.info(f"Deleting tag: marking tag as deleted..")
+            statement = (
+                update(Tag)
+                .where(Tag.uid == tag_uid, Tag.deleted_at.is_(None))
+                .values(deleted_at=datetime.now())
+                .returning(Tag.uid)
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.exec(statement)
+            tag = result.first()
             if not tag:
                 logger.error("Deleting tag: tag not found")
                 raise TagNotFound()
 
-            await session.delete(tag)
+            await stats_service.drop(TAG_ITEMS, tag.uid, session)
+            await event_service.publish(TAG_DELETED, {"tag_uid": tag.uid}, session)
             await session.commit()
 
             return tag
         except Exception as e:
             logger.error(f"DB Error: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+    async def purge_deleted_tags(self, deleted_before: datetime, batch_size: int, session: AsyncSession):
+        """Hard delete tombstoned tags. A popular tag can carry a huge number
+        of links, so those are removed batch_size rows at a time first."""
+
+        try:
+            logger.info(f"Purging deleted tags: deleting data from database..")
+            params = {"deleted_before": deleted_before, "batch_size": batch_size}
+            result = await session.exec(
+                text("""
+                    DELETE FROM itemtag WHERE ctid = ANY(ARRAY(
+                        SELECT it.ctid FROM itemtag it
+                        JOIN tags t ON t.uid = it.tag_id
+                        WHERE t.deleted_at < :deleted_before
+                        LIMIT :batch_size
+                    ))
+                """),
+                params=params,
+            )
+            purged = result.rowcount
+            if purged == 0:
+                result = await session.exec(
+                    text("""
+                        DELETE FROM tags WHERE uid = ANY(ARRAY(
+                            SELECT t.uid FROM tags t
+                            WHERE t.deleted_at < :deleted_before
+                            AND NOT EXISTS (SELECT 1 FROM itemtag it WHERE it.tag_id = t.uid)
+                            LIMIT :batch_size
+                        ))
+                    """),
+                    params=params,
+                )
+                purged = result.rowcount
+            await session.commit()
+            return purged
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
+            raise
@@ -0,0 +1,306 @@
+"""Minimal distributed tracing: spans, W3C trace context and exporters.
+
+The active span lives in a context variable, so it follows the request
+through awaits, tasks created from it, threadpool calls and SQLAlchemy's
+greenlets. Trace context crosses process boundaries as a W3C `traceparent`
+header, on incoming HTTP requests and on Celery task messages.
+
+Sampling is decided once per trace at its root (TRACING_SAMPLE_RATE) and
+inherited by every child and by downstream processes through the
+traceparent flags. Sampled spans are batched by a background thread and
+written to a JSON lines file or POSTed to an OTLP/HTTP collector
+(TRACING_EXPORTER). With TRACING_EXPORTER=none nothing is recorded, but
+every request still gets a trace id for its log lines.
+"""
+import asyncio
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+from src.config import Config
+
+
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "sampled",
+                 "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: str | None,
+                 sampled: bool, attributes: dict | None = None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.error: str | None = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.error = repr(error)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """(trace id, parent span id, sampled) from a W3C traceparent header"""
+    if not value:
+        return None
+    parts = value.strip().lower().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> dict:
+    otlp = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": SPAN_KINDS[span.kind],
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        otlp["parentSpanId"] = span.parent_id
+    return otlp
+
+
+class SpanExporter:
+    """Ships finished spans from a daemon thread, in batches of `batch_size`
+    or every `interval` seconds. The queue is bounded; when the exporter
+    can't keep up spans are dropped and counted, requests never wait on it."""
+
+    def __init__(self, kind: str, service: str, path: str, endpoint: str,
+                 batch_size: int = 512, interval: float = 2.0, max_queue: int = 10000):
+        self.kind = kind
+        self.service = service
+        self.path = path
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue: queue.Queue[Span] = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def export(self, span: Span):
+        # started lazily, and again in a forked child, whose copy of the thread is gone
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self) -> list[Span]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            while batch := self._drain():
+                self._write(batch)
+
+    def _write(self, batch: list[Span]):
+        try:
+            if self.kind == "jsonl":
+                lines = "".join(json.dumps({"service": self.service, **span.to_dict()}) + "\n" for span in batch)
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a") as f:
+                    # one write per batch, so several workers can append to the same file
+                    f.write(lines)
+            else:
+                payload = {"resourceSpans": [{
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service}}]},
+                    "scopeSpans": [{"scope": {"name": "warehouse"}, "spans": [_otlp_span(span) for span in batch]}],
+                }]}
+                request = urllib.request.Request(
+                    self.endpoint, data=json.dumps(payload).encode(),
+                    headers={"Content-Type": "application/json"}, method="POST",
+                )
+                urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Tracing: dropping {len(batch)} spans, export failed: {e!r}")
+
+    def shutdown(self):
+        if self._thread is not None and self._pid == os.getpid():
+            self._stop.set()
+            self._thread.join(timeout=self.interval + 5)
+        while batch := self._drain():
+            self._write(batch)
+
+
+class Tracer:
+
+    def __init__(self):
+        self._exporter: SpanExporter | None = None
+        self._configured = False
+
+    @property
+    def exporter(self) -> SpanExporter | None:
+        if not self._configured:
+            self._configured = True
+            if Config.TRACING_EXPORTER != "none":
+                self._exporter = SpanExporter(
+                    Config.TRACING_EXPORTER,
+                    service=Config.TRACING_SERVICE_NAME,
+                    path=Config.TRACING_FILE,
+                    endpoint=Config.TRACING_OTLP_ENDPOINT,
+                )
+                atexit.register(self._exporter.shutdown)
+        return self._exporter
+
+    def begin(self, name: str, kind: str = "internal", attributes: dict | None = None,
+              traceparent: str | None = None) -> Span:
+        """New span under `traceparent` if given, else under the current span,
+        else the root of a new trace. Ended by `end`, not made current."""
+        parent = parse_traceparent(traceparent)
+        current = _current_span.get()
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        elif current is not None:
+            trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = self.exporter is not None and random.random() < Config.TRACING_SAMPLE_RATE
+        return Span(name, kind, trace_id, parent_id, sampled, attributes)
+
+    def child(self, name: str, kind: str = "internal", attributes: dict | None = None) -> Span | None:
+        """Span under the current one, None outside of any trace or when the
+        trace isn't sampled, for the high volume spans (SQL, Redis)"""
+        current = _current_span.get()
+        if current is None or not current.sampled:
+            return None
+        return Span(name, kind, current.trace_id, current.span_id, True, attributes)
+
+    def end(self, span: Span):
+        span.end_ns = time.time_ns()
+        if span.sampled and self.exporter is not None:
+            self.exporter.export(span)
+
+    def activate(self, span: Span) -> contextvars.Token:
+        return _current_span.set(span)
+
+    def deactivate(self, token: contextvars.Token):
+        _current_span.reset(token)
+
+    @contextmanager
+    def start_span(self, name: str, kind: str = "internal", attributes: dict | None = None,
+                   traceparent: str | None = None):
+        span = self.begin(name, kind, attributes, traceparent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except asyncio.CancelledError:
+            span.set_attribute("cancelled", True)
+            raise
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end(span)
+
+    def shutdown(self):
+        if self._exporter is not None:
+            self._exporter.shutdown()
+
+
+tracer = Tracer()
+
+
+def current_traceparent() -> str | None:
+    span = _current_span.get()
+    return span.traceparent if span is not None else None
+
+
+def traced(cls):
+    """Class decorator, a `<Class>.<method>` span around every public
+    coroutine method of a service"""
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(method):
+            continue
+        setattr(cls, name, _traced_method(f"{cls.__name__}.{name}", method))
+    return cls
+
+
+def _traced_method(span_name: str, method):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        with tracer.start_span(span_name):
+            return await method(*args, **kwargs)
+    return wrapper
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds the current trace id to log records, `-` outside of a trace"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = _current_span.get()
+        record.trace_id = span.trace_id if span is not None else "-"
+        return True
@@ -9,6 +9,7 @@ from src.db.redis import token_in_blocklist
 from src.db.main import get_session
 from .services import UserService
 from src.db.models import User
+from src.loaders import get_loaders
 from src.errors import(
     InvalidToken,
     RevokedToken,
@@ -64,7 +65,8 @@ class RefreshTokenBearer(TokenBearer):
 async def get_current_user(token_details: dict = Depends(AccessTokenBearer()), 
                      session: AsyncSession = Depends(get_session)):
     user_email= token_details['user']['email']
-    user = await user_service.get_user_by_email(user_email, session)
+    # cached for the request, services asking for the same user don't query again
+    user = await get_loaders(session).users_by_email.load(user_email)
     if not user:
         logger.error("Invalid Credentials")
         raise InvalidCredentials()
@@ -1,18 +1,22 @@
 from fastapi import (
     APIRouter, 
     Depends, 
+    Query,
     status, 
     HTTPException
 )
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import timedelta, datetime
+from typing import Optional
+import uuid
 from fastapi.responses import JSONResponse
 
 from .schemas import (
     CreateUser, 
     UserModel,
     UserLogin, 
-    UserItems,
+    UserProfile,
     EmailModel,
     PasswordResetRequest,
     PasswordResetConfirm
@@ -34,25 +38,35 @@ from .dependencies import (
     RoleChecker
 )
 from src.db.redis import add_jti_to_blocklist
+from src.admission import AdmissionControl, RateLimiter, StatementTimeout
 from src.errors import (
     UserAlreadyExists,
     InvalidCredentials,
     InvalidToken,
     UserNotFound
 )
+from src.items.services import ItemsService
+from src.notes.services import NotesService
+from src.stats.services import StatsService, USER_ITEMS, USER_NOTES
 from src.config import Config
-from src.celery_task import send_email
+from src.mail import dispatch_email
 from src.logging import logger
 
 
 
 auth_router = APIRouter()
 user_service = UserService()
+item_service = ItemsService()
+notes_service = NotesService()
+stats_service = StatsService()
 role_checker= RoleChecker(['admin','user'])
 
 REFRESH_TOKEN_EXPIRY = 2
 refresh_token_bearer = RefreshTokenBearer()
 access_token_bearer = AccessTokenBearer()
+login_admission = Depends(AdmissionControl("login"))
+login_rate_limit = Depends(RateLimiter("login", scope="ip"))
+login_timeout = Depends(StatementTimeout("login"))
 
 
 @auth_router.post("/send_mail")
@@ -60,14 +74,13 @@ async def send_mail(emails: EmailModel):
 
     logger.info("Sending email: processing request..")
     emails = emails.addresses
-    html = "<h1>Welcome to the Warehouse App</h1>"
-    subject = "Welcome to the Warehouse App"
 
     logger.info("Sending email: sending email..")
-    send_email.delay(
+    dispatch_email(
         recipients=emails,
-        subject=subject,
-        html_message=html
+        template_id="welcome",
+        context={},
+        bulk=True
     )
     logger.info("Sending email: returning result..")
     return {"message": "Email sent successfully"}
@@ -88,19 +101,12 @@ async def create_user_account(user_data: CreateUser, session:AsyncSession = Depe
     token_data = create_url_safe_token({"email":email})
     
     link = f"http://{Config.DOMAIN}/api/v1/auth/verify/{token_data}"
-    html_message = f"""
-    <h1>Verify your email</h1>
-    <p> Please click this <a href="{link}">link</a> to verify your email</p>
-
-    """
-    
-    subject="Warehouse App email verification"
 
     logger.info("Creating user account: sending email..")
-    send_email.delay(
+    dispatch_email(
         recipients=[email],
-        subject=subject,
-        html_message=html_message
+        template_id="verify_email",
+        context={"link": link}
     )
     logger.info("Creating user account: returning result..")
     return  {
@@ -135,7 +141,7 @@ async def verify_email(token:str, session: AsyncSession = Depends(get_session)):
     )
 
 
-@auth_router.post("/login")
+@auth_router.post("/login", dependencies=[login_timeout, login_rate_limit, login_admission])
 async def login_user(logindata:UserLogin, session: AsyncSession = Depends(get_session)):
 
     email = logindata.email
@@ -146,7 +152,8 @@ async def login_user(logindata:UserLogin, session: AsyncSession = Depends(get_se
         logger.error("Logging in user: user not found")
         raise InvalidCredentials()
     
-    is_pwd_valid = verified_pwd(password, user.password_hash)
+    # bcrypt releases the GIL, keep it off the event loop
+    is_pwd_valid = await run_in_threadpool(verified_pwd, password, user.password_hash)
     if is_pwd_valid:
         access_token = create_access_token(
             user_data= {
@@ -201,12 +208,34 @@ async def get_new_access_token(token_details: dict = Depends(refresh_token_beare
     raise InvalidToken()
 
 
-@auth_router.get("/me", response_model=UserItems)
-async def get_current_user(user: UserModel = Depends(get_current_user), _:bool = Depends(role_checker)):
+@auth_router.get("/me", response_model=UserProfile)
+async def get_current_user(
+    include: Optional[str] = Query(default=None, pattern=r"^(items|notes)(,(items|notes))?$", description="items,notes"),
+    limit: int = Query(default=20, ge=1, le=100),
+    items_before: Optional[uuid.UUID] = Query(default=None, description="items next_cursor of the previous page"),
+    notes_cursor: Optional[str] = Query(default=None, description="notes next_cursor of the previous page"),
+    user: UserModel = Depends(get_current_user),
+    _:bool = Depends(role_checker),
+    session: AsyncSession = Depends(get_session),
+):
+
+    logger.info(f"Getting current user {user.email}: processing request..")
+    sections = set(include.split(",")) if include else set()
+    counts = await stats_service.get_counters([(USER_ITEMS, user.uid), (USER_NOTES, user.uid)], session)
+    profile = {
+        **user.model_dump(),
+        "items_count": counts[(USER_ITEMS, str(user.uid))],
+        "notes_count": counts[(USER_NOTES, str(user.uid))],
+    }
+    if "items" in sections:
+        items = await item_service.get_user_items(user.uid, session, limit=limit, before=items_before)
+        next_cursor = items[-1]["uid"] if len(items) == limit else None
+        profile["items"] = {"items": items, "next_cursor": next_cursor}
+    if "notes" in sections:
+        profile["notes"] = await notes_service.get_user_notes(user.uid, session, limit=limit, cursor=notes_cursor)
 
-    logger.info(f"Getting current user {user.email}: returning result..")
     logger.info("Getting current user: returning result..")
-    return user
+    return profile
 
 
 @auth_router.get("/logout")
@@ -230,18 +259,12 @@ async def password_reset_request(email_data: PasswordResetRequest):
     token_data = create_url_safe_token({"email":email})
     
     link = f"http://{Config.DOMAIN}/api/v1/auth/password-reset-confirm/{token_data}"
-    html_message = f"""
-    <h1>Reset your password</h1>
-    <p> Please click this <a href="{link}">link</a> to reset your password</p>
 
-    """
-    
-    subject="Warehouse password reset"
     logger.info(f"Resetting password: sending email..")
-    send_email.delay(
+    dispatch_email(
         recipients=[email],
-        subject=subject,
-        html_message=html_message
+        template_id="password_reset",
+        context={"link": link}
     )
 
     logger.info("Resetting password: returning result..")
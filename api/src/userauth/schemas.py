@@ -1,10 +1,10 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 import uuid
-from typing import List
+from typing import List, Optional
 
-from src.items.schemas import Items
-from src.notes.schemas import Notes
+from src.items.schemas import ItemPage
+from src.notes.schemas import NotePage
 
 
 class CreateUser(BaseModel):
@@ -39,9 +39,20 @@ class UserModel(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-class UserItems(UserModel):
-    items:List[Items]
-    notes:List[Notes]
+class UserProfile(BaseModel):
+    uid: uuid.UUID
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    role: str
+    is_verified: bool
+    created_at: datetime
+    updated_at: datetime
+    items_count: int
+    notes_count: int
+    items: Optional[ItemPage] = None
+    notes: Optional[NotePage] = None
 
 
 class UserLogin(BaseModel):
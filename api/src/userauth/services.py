@@ -4,18 +4,27 @@ from sqlmodel import select
 from src.db.models import User
 from .schemas import CreateUser
 from .utils import generate_pwhash
+from src.singleflight import SingleFlight
+from src.tracing import traced
 from src.logging import logger
 
 
+# every authenticated request looks its user up by email
+user_flight = SingleFlight("user_by_email")
+
+
+@traced
 class UserService:
     async def get_user_by_email(self, email:str, session: AsyncSession):
         
         try:
             logger.info(f"Getting user by email: Getting data from database..")
-            query = select(User).where(User.email == email)
-            user_getter = await session.exec(query)
-            
-            return user_getter.first()
+
+            async def fetch(session: AsyncSession):
+                user_getter = await session.exec(select(User).where(User.email == email))
+                return user_getter.first()
+
+            return await user_flight.do(email, session, fetch)
         except Exception as e:
             logger.error(f"DB Error: {e}")
             raise 
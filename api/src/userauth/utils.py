@@ -1,4 +1,3 @@
-from passlib.context import CryptContext
 from datetime import timedelta,datetime
 import jwt
 import uuid
@@ -6,23 +5,36 @@ import logging
 from itsdangerous import URLSafeTimedSerializer
 
 from src.config import Config 
+from src.tracing import tracer
 
-passwd_context = CryptContext(
-    schemes=["bcrypt"]
-    ,deprecated="auto"
-)
+_passwd_context = None
+
+
+def get_passwd_context():
+    """bcrypt context, passlib is imported on the first hash or verify"""
+    global _passwd_context
+    if _passwd_context is None:
+        from passlib.context import CryptContext
+
+        _passwd_context = CryptContext(
+            schemes=["bcrypt"]
+            ,deprecated="auto"
+        )
+    return _passwd_context
 
 ACCESS_TOKEN_EXPIRY = 3600
 
 def generate_pwhash(password:str) -> str:
 
-    hashed_pass = passwd_context.hash(password)
+    with tracer.start_span("bcrypt.hash"):
+        hashed_pass = get_passwd_context().hash(password)
     return hashed_pass
 
 
 def verified_pwd(password:str, hash:str) -> bool:
     
-    return passwd_context.verify(password,hash)
+    with tracer.start_span("bcrypt.verify"):
+        return get_passwd_context().verify(password,hash)
 
 
 def create_access_token (user_data: dict, expiry:timedelta=None, refresh: bool = False):
@@ -59,15 +71,23 @@ def decode_token(token:str) -> dict:
         return None 
 
 
-serializer = URLSafeTimedSerializer(
-    secret_key=Config.JWT_SECRET_KEY, salt="email-configuration"
-)
+_serializer = None
+
+
+def get_serializer() -> URLSafeTimedSerializer:
+    """Signer of the email tokens, built on first use with the JWT secret"""
+    global _serializer
+    if _serializer is None:
+        _serializer = URLSafeTimedSerializer(
+            secret_key=Config.JWT_SECRET_KEY, salt="email-configuration"
+        )
+    return _serializer
 
 
 def create_url_safe_token(data: dict):
     """Serialize a dict into a URLSafe token"""
 
-    token = serializer.dumps(data)
+    token = get_serializer().dumps(data)
 
     return token
 
@@ -75,7 +95,7 @@ def decode_url_safe_token(token:str):
     """Deserialize a URLSafe token to get data"""
     
     try:
-        token_data = serializer.loads(token)
+        token_data = get_serializer().loads(token)
 
         return token_data
 
@@ -0,0 +1,48 @@
+import asyncio
+
+from benchmarks.env import load_bench_env
+
+load_bench_env()
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from src.middleware import register_middleware  # noqa: E402
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    register_middleware(app)
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/large")
+    async def large():
+        return {"items": [{"uid": str(i), "name": "item"} for i in range(500)]}
+
+    return app
+
+
+async def get(path: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        return await client.get(path, headers={"Accept-Encoding": "gzip"})
+
+
+def test_small_response_is_not_compressed():
+    response = asyncio.run(get("/small"))
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-length"] == str(len(response.content))
+    assert response.json() == {"status": "ok"}
+
+
+def test_large_response_is_compressed():
+    response = asyncio.run(get("/large"))
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["items"]) == 500